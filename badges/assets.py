@@ -0,0 +1,122 @@
+import aiohttp
+import asyncio
+import logging
+import threading
+
+from collections import OrderedDict
+from io import BytesIO
+from PIL import Image, ImageChops, ImageFont
+from redbot.core.data_manager import bundled_data_path
+from typing import Dict, Optional, Tuple
+
+from .barcode import generate, ImageWriter
+
+log = logging.getLogger("red.trusty-cogs.Badges")
+
+BARCODE_SIZE = (555, 125)
+
+
+def remove_white_barcode(img: Image.Image) -> Image.Image:
+    """Make every pure white pixel transparent"""
+    img = img.convert("RGBA")
+    r, g, b, a = img.split()
+    white = ImageChops.multiply(
+        ImageChops.multiply(_only(r, 255), _only(g, 255)), _only(b, 255)
+    )
+    img.putalpha(ImageChops.darker(a, ImageChops.invert(white)))
+    return img
+
+
+def invert_barcode(img: Image.Image) -> Image.Image:
+    """Turn every pure black pixel white"""
+    img = img.convert("RGBA")
+    r, g, b, a = img.split()
+    black = ImageChops.multiply(ImageChops.multiply(_only(r, 0), _only(g, 0)), _only(b, 0))
+    img.paste((255, 255, 255, 255), (0, 0) + img.size, black)
+    return img
+
+
+def _only(channel: Image.Image, value: int) -> Image.Image:
+    """A mask that is 255 wherever the channel equals value"""
+    return channel.point([255 if i == value else 0 for i in range(256)])
+
+
+class BadgeAssets:
+    """
+        Images and fonts reused between badges
+
+        Templates are downloaded and decoded once per URL. Fonts and each
+        users barcode are built the first time they're needed. Barcodes
+        and fonts are made in the executor so those caches are locked.
+    """
+
+    def __init__(
+        self, cog, session: aiohttp.ClientSession, max_templates: int = 20, max_barcodes: int = 500
+    ):
+        self.cog = cog
+        self.session = session
+        self.max_templates = max_templates
+        self.max_barcodes = max_barcodes
+        self.font_path = str(bundled_data_path(cog) / "arial.ttf")
+        self._templates: "OrderedDict[str, Image.Image]" = OrderedDict()
+        self._barcodes: "OrderedDict[Tuple[int, bool], Image.Image]" = OrderedDict()
+        self._fonts: Dict[int, Optional[ImageFont.FreeTypeFont]] = {}
+        self._lock = threading.Lock()
+
+    async def get_template(self, url: str, loop: asyncio.AbstractEventLoop) -> Image.Image:
+        """A copy of the badge template ready to draw on"""
+        template = self._templates.get(url)
+        if template is None:
+            async with self.session.get(url) as resp:
+                # Don't try to decode or cache an error page
+                resp.raise_for_status()
+                data = await resp.read()
+            template = await loop.run_in_executor(None, self._decode, data)
+            self._templates[url] = template
+            while len(self._templates) > self.max_templates:
+                self._templates.popitem(last=False)
+        else:
+            self._templates.move_to_end(url)
+        return template.copy()
+
+    @staticmethod
+    def _decode(data: bytes) -> Image.Image:
+        return Image.open(BytesIO(data)).convert("RGBA")
+
+    def font(self, size: int) -> Optional[ImageFont.FreeTypeFont]:
+        with self._lock:
+            if size in self._fonts:
+                return self._fonts[size]
+            try:
+                font = ImageFont.truetype(self.font_path, size)
+            except Exception:
+                log.error("Error loading the badge font", exc_info=True)
+                font = None
+            self._fonts[size] = font
+            return font
+
+    def barcode(self, user_id: int, inverted: bool) -> Image.Image:
+        """The users ID as a transparent Code39 barcode sized for the badge"""
+        key = (user_id, inverted)
+        with self._lock:
+            barcode = self._barcodes.get(key)
+            if barcode is not None:
+                self._barcodes.move_to_end(key)
+                return barcode
+        output = BytesIO()
+        generate("code39", str(user_id), writer=ImageWriter(self.cog), output=output)
+        barcode = remove_white_barcode(Image.open(output))
+        if inverted:
+            barcode = invert_barcode(barcode)
+        barcode = barcode.resize(BARCODE_SIZE, Image.ANTIALIAS)
+        with self._lock:
+            self._barcodes[key] = barcode
+            while len(self._barcodes) > self.max_barcodes:
+                self._barcodes.popitem(last=False)
+        return barcode
+
+    def clear(self) -> None:
+        with self._lock:
+            self._templates = OrderedDict()
+            self._barcodes = OrderedDict()
+            self._fonts = {}
@@ -3,18 +3,19 @@ from redbot.core import commands, Config
 from redbot.core.i18n import Translator, cog_i18n
 import aiohttp
 import os
-from PIL import Image, ImageColor, ImageFont, ImageDraw
+from PIL import Image, ImageColor, ImageDraw
 from PIL import ImageSequence
-from .barcode import generate, ImageWriter
-from redbot.core.data_manager import bundled_data_path
+from .assets import BadgeAssets
 from io import BytesIO
 from .templates import blank_template
 from .badge_entry import Badge
 import sys
 import functools
 import asyncio
+import logging
 
 _ = Translator("Badges", __file__)
+log = logging.getLogger("red.trusty-cogs.Badges")
 
 
 @cog_i18n(_)
@@ -31,36 +32,7 @@ class Badges(commands.Cog):
         self.config.register_global(**default_global)
         self.config.register_guild(**default_guild)
         self.session = aiohttp.ClientSession(loop=self.bot.loop)
-
-    def remove_white_barcode(self, img):
-        """https://stackoverflow.com/questions/765736/using-pil-to-make-all-white-pixels-transparent"""
-        img = img.convert("RGBA")
-        datas = img.getdata()
-
-        newData = []
-        for item in datas:
-            if item[0] == 255 and item[1] == 255 and item[2] == 255:
-                newData.append((255, 255, 255, 0))
-            else:
-                newData.append(item)
-
-        img.putdata(newData)
-        return img
-
-    def invert_barcode(self, img):
-        """https://stackoverflow.com/questions/765736/using-pil-to-make-all-white-pixels-transparent"""
-        img = img.convert("RGBA")
-        datas = img.getdata()
-
-        newData = []
-        for item in datas:
-            if item[0] == 0 and item[1] == 0 and item[2] == 0:
-                newData.append((255, 255, 255))
-            else:
-                newData.append(item)
-
-        img.putdata(newData)
-        return img
+        self.assets = BadgeAssets(self, self.session)
 
     async def dl_image(self, url: str):
         """Download bytes like object of user avatar"""
@@ -90,29 +62,15 @@ class Badges(commands.Cog):
             status = _("AWAITING INSTRUCTIONS")
         if str(status) == "dnd":
             status = _("MIA")
-        barcode = BytesIO()
-        temp_barcode = generate("code39", str(user.id), writer=ImageWriter(self), output=barcode)
-        barcode = Image.open(barcode)
-        barcode = self.remove_white_barcode(barcode)
+        barcode = self.assets.barcode(user.id, badge.is_inverted)
         fill = (0, 0, 0)  # text colour fill
         if badge.is_inverted:
             fill = (255, 255, 255)
-            barcode = self.invert_barcode(barcode)
-        template = Image.open(template)
-        template = template.convert("RGBA")
-        barcode = barcode.convert("RGBA")
-        barcode = barcode.resize((555, 125), Image.ANTIALIAS)
         template.paste(barcode, (400, 520), barcode)
         # font for user information
-        font_loc = str(bundled_data_path(self) / "arial.ttf")
-        try:
-            font1 = ImageFont.truetype(font_loc, 30)
-            font2 = ImageFont.truetype(font_loc, 24)
-        except Exception as e:
-            print(e)
-            font1 = None
-            font2 = None
+        font1 = self.assets.font(30)
         # font for extra information
+        font2 = self.assets.font(24)
 
         draw = ImageDraw.Draw(template)
         # adds username
@@ -176,7 +134,11 @@ class Badges(commands.Cog):
 
     async def create_badge(self, user, badge, is_gif: bool):
         """Async create badges handler"""
-        template_img = await self.dl_image(badge.file_name)
+        try:
+            template_img = await self.assets.get_template(badge.file_name, self.bot.loop)
+        except aiohttp.ClientError:
+            log.error("Error downloading badge template %s", badge.file_name, exc_info=True)
+            return
         task = functools.partial(self.make_template, user=user, badge=badge, template=template_img)
         task = self.bot.loop.run_in_executor(None, task)
         try:
@@ -295,4 +257,5 @@ class Badges(commands.Cog):
         await ctx.send(embed=em)
 
     def __unload(self):
+        self.assets.clear()
         self.bot.loop.create_task(self.session.close())
@@ -0,0 +1,57 @@
+from typing import Dict, List, Optional
+
+from .unicode_codes import UNICODE_EMOJI
+
+# Marks the end of an emoji in the trie, holds the full emoji
+END = None
+
+_trie: Optional[Dict] = None
+
+
+def get_trie() -> Dict:
+    """Builds the unicode emoji trie the first time it's needed"""
+    global _trie
+    if _trie is None:
+        root: Dict = {}
+        for emoji in UNICODE_EMOJI:
+            node = root
+            for char in emoji:
+                node = node.setdefault(char, {})
+            node[END] = emoji
+        _trie = root
+    return _trie
+
+
+def find_unicode_emojis(text: str) -> List[str]:
+    """
+        Find every unicode emoji in the text
+
+        Uses the longest emoji starting at each position so sequences
+        like flags and skin tones aren't split into their parts
+    """
+    trie = get_trie()
+    found = []
+    i = 0
+    length = len(text)
+    while i < length:
+        node = trie.get(text[i])
+        if node is None:
+            i += 1
+            continue
+        match_end = 0
+        j = i
+        while True:
+            if END in node:
+                match_end = j + 1
+            j += 1
+            if j >= length:
+                break
+            node = node.get(text[j])
+            if node is None:
+                break
+        if match_end:
+            found.append(text[i:match_end])
+            i = match_end
+        else:
+            i += 1
+    return found
@@ -1,13 +1,14 @@
 import discord
 from redbot.core import commands, Config, checks
 from redbot.core.i18n import Translator, cog_i18n
-from .unicode_codes import UNICODE_EMOJI
+from .emoji_trie import find_unicode_emojis
+from .reaction_queue import ReactionDispatcher
+from typing import Dict
 import re
 
 _ = Translator("EmojiReactions", __file__)
 
 EMOJI = re.compile(r"(<?(a)?:([0-9a-zA-Z]+):([0-9]+)?>?)")
-UNICODE_RE = re.compile("|".join(rf"{re.escape(w)}" for w in UNICODE_EMOJI.keys()))
 
 listener = getattr(commands.Cog, "listener", None)  # red 3.0 backwards compatibility support
 
@@ -27,6 +28,19 @@ class EmojiReactions(commands.Cog):
         default_guild = {"unicode": False, "guild": False, "random": False}
         self.config = Config.get_conf(self, 35677998656)
         self.config.register_guild(**default_guild)
+        self.settings: Dict[int, dict] = {}
+        self.reactions = ReactionDispatcher(bot)
+
+    def cog_unload(self):
+        self.reactions.close()
+
+    __unload = cog_unload
+
+    async def get_settings(self, guild: discord.Guild) -> dict:
+        """Returns the guilds settings keeping them until they're changed"""
+        if guild.id not in self.settings:
+            self.settings[guild.id] = await self.config.guild(guild).all()
+        return self.settings[guild.id]
 
     @commands.group()
     @checks.admin_or_permissions(manage_messages=True)
@@ -61,11 +75,11 @@ class EmojiReactions(commands.Cog):
         if await self.config.guild(ctx.guild).unicode():
             await self.config.guild(ctx.guild).unicode.set(False)
             msg = _("Okay, I will not react to messages " "containing unicode emojis!")
-            await ctx.send(msg)
         else:
             await self.config.guild(ctx.guild).unicode.set(True)
             msg = _("Okay, I will react to messages " "containing unicode emojis!")
-            await ctx.send(msg)
+        self.settings.pop(ctx.guild.id, None)
+        await ctx.send(msg)
 
     @emojireact.command(name="guild")
     async def _guild(self, ctx):
@@ -73,11 +87,11 @@ class EmojiReactions(commands.Cog):
         if await self.config.guild(ctx.guild).guild():
             await self.config.guild(ctx.guild).guild.set(False)
             msg = _("Okay, I will not react to messages " "containing server emojis!")
-            await ctx.send(msg)
         else:
             await self.config.guild(ctx.guild).guild.set(True)
             msg = _("Okay, I will react to messages " "containing server emojis!")
-            await ctx.send(msg)
+        self.settings.pop(ctx.guild.id, None)
+        await ctx.send(msg)
 
     @emojireact.command(name="all")
     async def _all(self, ctx):
@@ -88,12 +102,12 @@ class EmojiReactions(commands.Cog):
             await self.config.guild(ctx.guild).guild.set(False)
             await self.config.guild(ctx.guild).unicode.set(False)
             msg = _("Okay, I will not react to messages " "containing all emojis!")
-            await ctx.send(msg)
         else:
             await self.config.guild(ctx.guild).guild.set(True)
             await self.config.guild(ctx.guild).unicode.set(True)
             msg = _("Okay, I will react to messages " "containing all emojis!")
-            await ctx.send(msg)
+        self.settings.pop(ctx.guild.id, None)
+        await ctx.send(msg)
 
     @listener()
     async def on_message(self, message):
@@ -101,23 +115,20 @@ class EmojiReactions(commands.Cog):
         emoji_list = []
         if message.guild is None:
             return
+        settings = await self.get_settings(message.guild)
+        if not settings["guild"] and not settings["unicode"]:
+            return
         if not channel.permissions_for(message.guild.me).add_reactions:
             return
-        if await self.config.guild(message.guild).guild():
+        if settings["guild"]:
             for match in EMOJI.finditer(message.content):
                 if match.group(4):
                     emoji_list.append(f"{match.group(2)}:{match.group(3)}:{match.group(4)}")
                 else:
                     emoji_list.append(discord.utils.get(self.bot.emojis, name=match.group(3)))
-        if await self.config.guild(message.guild).unicode():
-            for emoji in UNICODE_RE.findall(message.content):
-                emoji_list.append(str(emoji))
+        if settings["unicode"]:
+            for emoji in find_unicode_emojis(message.content):
+                emoji_list.append(emoji)
         if emoji_list == []:
             return
-        for emoji in emoji_list:
-            try:
-                await message.add_reaction(emoji)
-            except discord.errors.Forbidden:
-                return
-            except discord.errors.HTTPException:
-                continue
+        self.reactions.dispatch(message, emoji_list)
@@ -0,0 +1,74 @@
+import asyncio
+import logging
+import discord
+
+from typing import Dict, List, Union
+
+log = logging.getLogger("red.trusty-cogs.EmojiReactions")
+
+Emoji = Union[str, discord.Emoji]
+
+
+class ReactionDispatcher:
+    """
+        Adds reactions to messages one channel at a time
+
+        Each channel gets its own queue and worker so a busy channel only
+        waits on itself. Duplicate emojis are removed and each message gets
+        at most `max_reactions`. Once a channel has `max_queued` messages
+        waiting any more are skipped until it catches up.
+    """
+
+    def __init__(self, bot, max_reactions: int = 10, max_queued: int = 20):
+        self.bot = bot
+        self.max_reactions = max_reactions
+        self.max_queued = max_queued
+        self._queues: Dict[int, asyncio.Queue] = {}
+        self._workers: Dict[int, asyncio.Task] = {}
+
+    def dispatch(self, message: discord.Message, emojis: List[Emoji]) -> None:
+        unique: List[Emoji] = []
+        seen = set()
+        for emoji in emojis:
+            if emoji is None or str(emoji) in seen:
+                continue
+            seen.add(str(emoji))
+            unique.append(emoji)
+            if len(unique) >= self.max_reactions:
+                break
+        if not unique:
+            return
+        channel_id = message.channel.id
+        queue = self._queues.get(channel_id)
+        if queue is None:
+            queue = asyncio.Queue(maxsize=self.max_queued)
+            self._queues[channel_id] = queue
+        try:
+            queue.put_nowait((message, unique))
+        except asyncio.QueueFull:
+            log.debug("Skipping reactions in %s, too many waiting", channel_id)
+            return
+        worker = self._workers.get(channel_id)
+        if worker is None or worker.done():
+            self._workers[channel_id] = self.bot.loop.create_task(self._worker(channel_id))
+
+    async def _worker(self, channel_id: int) -> None:
+        queue = self._queues[channel_id]
+        while not queue.empty():
+            message, emojis = queue.get_nowait()
+            for emoji in emojis:
+                try:
+                    await message.add_reaction(emoji)
+                except discord.errors.Forbidden:
+                    break
+                except discord.errors.HTTPException:
+                    continue
+        # Nothing left to do in this channel
+        self._queues.pop(channel_id, None)
+        self._workers.pop(channel_id, None)
+
+    def close(self) -> None:
+        for worker in self._workers.values():
+            worker.cancel()
+        self._workers = {}
+        self._queues = {}
@@ -0,0 +1,116 @@
+import asyncio
+import json
+import logging
+import time
+import aiohttp
+
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from .constants import BASE_URL
+
+log = logging.getLogger("red.trusty-cogs.Hockey")
+
+# How long responses are considered fresh in seconds
+FEED_TTL = 10
+SCHEDULE_TTL = 60
+STANDINGS_TTL = 60 * 60
+ROSTER_TTL = 60 * 60 * 24
+PLAYER_TTL = 60 * 60 * 24
+MAX_CACHED = 256
+
+
+class CachedResponse:
+    __slots__ = ("text", "etag", "last_modified", "expires")
+
+    def __init__(self, text: str, etag: Optional[str], last_modified: Optional[str], expires: float):
+        self.text = text
+        self.etag = etag
+        self.last_modified = last_modified
+        self.expires = expires
+
+
+class NHLClient:
+    """
+        Shared client for the NHL stats API
+
+        Every request goes through one pooled session. Responses are cached
+        for the ttl given by the caller and revalidated with `If-None-Match`
+        and `If-Modified-Since` once stale. Callers asking for a url that is
+        already being fetched wait on that request instead of making another.
+        The raw response is cached and decoded for each caller so nobody can
+        modify anyone else's data.
+    """
+
+    def __init__(self):
+        self.session: Optional[aiohttp.ClientSession] = None
+        self._cache: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+        self._cache.clear()
+
+    def _remember(self, url: str, entry: CachedResponse):
+        self._cache[url] = entry
+        self._cache.move_to_end(url)
+        while len(self._cache) > MAX_CACHED:
+            self._cache.popitem(last=False)
+
+    async def _fetch(self, url: str, ttl: int) -> str:
+        if self.session is None:
+            self.session = aiohttp.ClientSession()
+        cached = self._cache.get(url)
+        headers = {}
+        if cached is not None:
+            if cached.etag:
+                headers["If-None-Match"] = cached.etag
+            if cached.last_modified:
+                headers["If-Modified-Since"] = cached.last_modified
+        async with self.session.get(url, headers=headers) as resp:
+            if resp.status == 304 and cached is not None:
+                cached.expires = time.monotonic() + ttl
+                self._cache.move_to_end(url)
+                return cached.text
+            resp.raise_for_status()
+            text = await resp.text()
+            entry = CachedResponse(
+                text,
+                resp.headers.get("ETag"),
+                resp.headers.get("Last-Modified"),
+                time.monotonic() + ttl,
+            )
+        self._remember(url, entry)
+        return text
+
+    async def get(self, url: str, ttl: int = SCHEDULE_TTL) -> dict:
+        """
+            Get the decoded json from the NHL API
+
+            `url` can be a full url or a path like `/api/v1/schedule`
+        """
+        if url.startswith("/"):
+            url = BASE_URL + url
+        cached = self._cache.get(url)
+        if cached is not None and cached.expires > time.monotonic():
+            self._cache.move_to_end(url)
+            return json.loads(cached.text)
+        if url not in self._inflight:
+            task = asyncio.ensure_future(self._fetch(url, ttl))
+            self._inflight[url] = task
+            task.add_done_callback(lambda t: self._inflight.pop(url, None))
+        text = await asyncio.shield(self._inflight[url])
+        return json.loads(text)
+
+
+_client: Optional[NHLClient] = None
+
+
+def get_client() -> NHLClient:
+    """Returns the NHL API client shared by everything in the cog"""
+    global _client
+    if _client is None:
+        _client = NHLClient()
+    return _client
@@ -1,7 +1,7 @@
 import discord
-import aiohttp
 from datetime import datetime
-from .constants import BASE_URL, TEAMS, HEADSHOT_URL
+from .constants import TEAMS, HEADSHOT_URL
+from .api import get_client, PLAYER_TTL
 from redbot.core.i18n import Translator
 import logging
 
@@ -52,10 +52,8 @@ async def roster_embed(post_list, page):
         Builds the embed for players by stats in the current season
     """
     player_list = post_list[page]
-    url = BASE_URL + player_list["person"]["link"] + "?expand=person.stats&stats=yearByYear"
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url) as resp:
-            player_data = await resp.json()
+    url = player_list["person"]["link"] + "?expand=person.stats&stats=yearByYear"
+    player_data = await get_client().get(url, PLAYER_TTL)
     player = player_data["people"][0]
     year_stats = [
         league
@@ -0,0 +1,45 @@
+from typing import Dict, Optional, Tuple
+
+from .goal import Goal
+
+
+class GameFeed:
+    """
+        What we saw of a game's live feed on the last poll
+
+        Keeps the raw play and the `Goal` built from it for every scoring
+        play so unchanged plays don't need to be parsed again, and the
+        feed timestamp so an unchanged feed can be skipped entirely.
+    """
+
+    __slots__ = ("timestamp", "pending", "plays")
+
+    def __init__(self):
+        self.timestamp: Optional[str] = None
+        self.pending: Optional[str] = None
+        self.plays: Dict[int, Tuple[dict, Goal]] = {}
+
+    def is_unchanged(self, data: dict) -> bool:
+        """
+            Checks the feed timestamp against the last one handled
+
+            The new timestamp is only kept once `commit` is called so a
+            feed that failed to be handled is checked again next poll.
+        """
+        timestamp = data.get("metaData", {}).get("timeStamp")
+        self.pending = timestamp
+        return timestamp is not None and timestamp == self.timestamp
+
+    def commit(self) -> None:
+        """Marks the last feed seen as handled"""
+        self.timestamp = self.pending
+
+    async def get_goal(self, play: dict, players: dict) -> Goal:
+        event_idx = play["about"]["eventIdx"]
+        if event_idx in self.plays:
+            old_play, goal = self.plays[event_idx]
+            if old_play == play:
+                return goal
+        goal = await Goal.from_json(play, players)
+        self.plays[event_idx] = (play, goal)
+        return goal
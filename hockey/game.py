@@ -1,16 +1,17 @@
-import aiohttp
 from datetime import datetime
-from redbot.core import Config
 from .pickems import Pickems
 from .constants import BASE_URL, TEAMS
+from .api import get_client, FEED_TTL, SCHEDULE_TTL
 from .goal import Goal
-from .helper import utc_to_local, check_to_post, get_team, get_team_role
+from .feeds import GameFeed
+from .helper import utc_to_local, get_team, get_team_role
 from .standings import Standings
 import discord
 import logging
 from redbot.core.i18n import Translator
 import asyncio
 
+from typing import Optional
 
 _ = Translator("Hockey", __file__)
 
@@ -132,9 +133,7 @@ class Game:
         if games_list != []:
             for games in games_list:
                 try:
-                    async with aiohttp.ClientSession() as session:
-                        async with session.get(BASE_URL + games["link"]) as resp:
-                            data = await resp.json()
+                    data = await get_client().get(games["link"], FEED_TTL)
                     # log.debug(BASE_URL + games["link"])
                     return_games_list.append(await Game.from_json(data))
                 except Exception:
@@ -171,9 +170,7 @@ class Game:
         if team not in ["all", None]:
             # if a team is provided get just that TEAMS data
             url += "&teamId={}".format(TEAMS[team]["id"])
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url) as resp:
-                data = await resp.json()
+        data = await get_client().get(url, SCHEDULE_TTL)
         game_list = [game for date in data["dates"] for game in date["games"]]
         return game_list
 
@@ -185,9 +182,7 @@ class Game:
         game = post_list[page]
 
         if type(game) is dict:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(BASE_URL + game["link"]) as resp:
-                    game_json = await resp.json()
+            game_json = await get_client().get(game["link"], FEED_TTL)
             data = await Game.from_json(game_json)
             log.debug(BASE_URL + game["link"])
         else:
@@ -421,10 +416,18 @@ class Game:
         return home_str, away_str
 
     async def check_game_state(self, bot):
+        """
+            Post anything that changed since the last check
+
+            Team data changed during the check is saved once at the end
+        """
+        with bot.get_cog("Hockey").team_store.batch():
+            await self._check_game_state(bot)
+
+    async def _check_game_state(self, bot):
         # post_state = ["all", self.home_team, self.away_team]
         home = await get_team(bot, self.home_team)
         # away = await get_team(self.away_team)
-        # team_list = await self.config.teams()
         # Home team checking
         if self.game_state == "Preview":
             """Checks if the the game state has changes from Final to Preview
@@ -483,16 +486,10 @@ class Game:
         post_state = ["all", self.home_team, self.away_team]
         state_embed = await self.game_state_embed()
         state_text = await self.game_state_text()
-        tasks = []
-        for channels in await bot.get_cog("Hockey").config.all_channels():
-            channel = bot.get_channel(id=channels)
-            if channel is None:
-                await bot.get_cog("Hockey").config._clear_scope(Config.CHANNEL, str(channels))
-                log.info("{} channel was removed because it no longer exists".format(channels))
-                continue
-            should_post = await check_to_post(bot, channel, post_state, self.game_state)
-            if should_post:
-                tasks.append(self.actually_post_state(bot, channel, state_embed, state_text))
+        routes = await bot.get_cog("Hockey").channel_router.routes(post_state, self.game_state)
+        tasks = [
+            self.actually_post_state(bot, channel, state_embed, state_text) for channel in routes
+        ]
         previews = await asyncio.gather(*tasks)
         for preview in previews:
             if preview is None:
@@ -507,14 +504,14 @@ class Game:
                         channel=channel, id=channel.id
                     ))
             return
-        config = bot.get_cog("Hockey").config
-        game_day_channels = await config.guild(guild).gdc()
+        settings = await bot.get_cog("Hockey").channel_router.guild_settings(guild)
+        game_day_channels = settings.gdc
         can_embed = channel.permissions_for(guild.me).embed_links
         # can_manage_webhooks = False  # channel.permissions_for(guild.me).manage_webhooks
 
         if self.game_state == "Live":
 
-            state_notifications = await config.guild(guild).game_state_notifications()
+            state_notifications = settings.game_state_notifications
             if state_notifications:
                 home_role, away_role = await get_team_role(guild, self.home_team, self.away_team)
                 if state_notifications == "auto" and guild.me.guild_permissions.manage_roles:
@@ -600,8 +597,8 @@ class Game:
         """
         home_team_data = await get_team(bot, self.home_team)
         away_team_data = await get_team(bot, self.away_team)
-        # all_data = await get_team("all")
-        team_list = await bot.get_cog("Hockey").config.teams()
+        team_store = bot.get_cog("Hockey").team_store
+        teams = {self.home_team: home_team_data, self.away_team: away_team_data}
         # post_state = ["all", self.home_team, self.away_team]
 
         # home_goal_ids = [goal.goal_id for goal in self.home_goals]
@@ -609,34 +606,34 @@ class Game:
 
         home_goal_list = list(home_team_data["goal_id"])
         away_goal_list = list(away_team_data["goal_id"])
+        current_goals = {goal.goal_id for goal in self.goals}
 
         for goal in self.goals:
             # goal_id = str(goal["result"]["eventCode"])
             # team = goal["team"]["name"]
-            team_data = await get_team(bot, goal.team_name)
-            if goal.goal_id not in team_data["goal_id"]:
+            team_data = teams.get(goal.team_name)
+            if team_data is None:
+                team_data = await get_team(bot, goal.team_name)
+            saved_goal = team_data["goal_id"].get(goal.goal_id)
+            if saved_goal is None:
                 # attempts to post the goal if there is a new goal
                 msg_list = await goal.post_team_goal(bot, self)
-                team_list.remove(team_data)
                 team_data["goal_id"][goal.goal_id] = {"goal": goal.to_json(), "messages": msg_list}
-                team_list.append(team_data)
-                await bot.get_cog("Hockey").config.teams.set(team_list)
+                team_store.save()
                 continue
-            if goal.goal_id in team_data["goal_id"]:
-                # attempts to edit the goal if the scorers have changed
-                old_goal = Goal(**team_data["goal_id"][goal.goal_id]["goal"])
-                if goal.description != old_goal.description:
-                    old_msgs = team_data["goal_id"][goal.goal_id]["messages"]
-                    team_list.remove(team_data)
-                    team_data["goal_id"][goal.goal_id]["goal"] = goal.to_json()
-                    team_list.append(team_data)
-                    await bot.get_cog("Hockey").config.teams.set(team_list)
-                    await goal.edit_team_goal(bot, self, old_msgs)
+            # attempts to edit the goal if the scorers have changed
+            if goal.description != saved_goal["goal"]["description"]:
+                old_msgs = saved_goal["messages"]
+                saved_goal["goal"] = goal.to_json()
+                team_store.save()
+                await goal.edit_team_goal(bot, self, old_msgs)
         # attempts to delete the goal if it was called back
         for goal_str in home_goal_list:
-            await Goal.remove_goal_post(bot, goal_str, self.home_team, self)
+            if goal_str not in current_goals:
+                await Goal.remove_goal_post(bot, goal_str, self.home_team, self)
         for goal_str in away_goal_list:
-            await Goal.remove_goal_post(bot, goal_str, self.away_team, self)
+            if goal_str not in current_goals:
+                await Goal.remove_goal_post(bot, goal_str, self.away_team, self)
 
     async def save_game_state(self, bot, time_to_game_start: str = "0"):
         """
@@ -644,9 +641,6 @@ class Game:
         """
         home = await get_team(bot, self.home_team)
         away = await get_team(bot, self.away_team)
-        team_list = await bot.get_cog("Hockey").config.teams()
-        team_list.remove(home)
-        team_list.remove(away)
         if self.game_state != "Final":
             if self.game_state == "Preview" and time_to_game_start != "0":
                 home["game_state"] = self.game_state + time_to_game_start
@@ -667,9 +661,7 @@ class Game:
             away["goal_id"] = {}
             home["game_start"] = ""
             away["game_start"] = ""
-        team_list.append(home)
-        team_list.append(away)
-        await bot.get_cog("Hockey").config.teams.set(team_list)
+        bot.get_cog("Hockey").team_store.save()
 
     async def post_time_to_game_start(self, bot, time_left):
         """
@@ -685,18 +677,12 @@ class Game:
                 home_emoji=self.home_emoji,
                 home=self.home_team,
             )
-        tasks = []
-        for channels in await bot.get_cog("Hockey").config.all_channels():
-            channel = bot.get_channel(id=channels)
-            if channel is None:
-                await bot.get_cog("Hockey").config._clear_scope(Config.CHANNEL, str(channels))
-                log.info("{} channel was removed because it no longer exists".format(channels))
-                continue
-
-            should_post = await check_to_post(bot, channel, post_state, self.game_state)
-            team_to_post = await bot.get_cog("Hockey").config.channel(channel).team()
-            if should_post and "all" not in team_to_post:
-                tasks.append(self.post_game_start(channel, msg))
+        routes = await bot.get_cog("Hockey").channel_router.routes(post_state, self.game_state)
+        tasks = [
+            self.post_game_start(channel, msg)
+            for channel, route in routes.items()
+            if "all" not in route.teams
+        ]
         await asyncio.gather(*tasks)
 
     async def post_game_start(self, channel, msg):
@@ -718,30 +704,35 @@ class Game:
     @staticmethod
     async def from_url(url: str):
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(BASE_URL + url) as resp:
-                    data = await resp.json()
+            data = await get_client().get(url, FEED_TTL)
             return await Game.from_json(data)
         except Exception:
             log.error(_("Error grabbing game data: "), exc_info=True)
             return
 
     @classmethod
-    async def from_json(cls, data: dict):
+    async def from_json(cls, data: dict, feed: Optional[GameFeed] = None):
+        """
+            Builds the game object from the live feed
+
+            If a `GameFeed` from the previous poll is provided only plays
+            that have changed since then are parsed into new `Goal` objects
+        """
         event = data["liveData"]["plays"]["allPlays"]
         home_team = data["gameData"]["teams"]["home"]["name"]
         away_team = data["gameData"]["teams"]["away"]["name"]
         players = data["liveData"]["boxscore"]["teams"]["away"]["players"]
         players.update(data["liveData"]["boxscore"]["teams"]["home"]["players"])
-        goals = [
-            await Goal.from_json(goal, players)
-            for goal in event
-            if goal["result"]["eventTypeId"] == "GOAL"
-            or (
+        goals = []
+        for goal in event:
+            if goal["result"]["eventTypeId"] == "GOAL" or (
                 goal["result"]["eventTypeId"] in ["SHOT", "MISSED_SHOT"]
                 and goal["about"]["ordinalNum"] == "SO"
-            )
-        ]
+            ):
+                if feed is not None:
+                    goals.append(await feed.get_goal(goal, players))
+                else:
+                    goals.append(await Goal.from_json(goal, players))
 
         if "currentPeriodOrdinal" in data["liveData"]["linescore"]:
             period_ord = data["liveData"]["linescore"]["currentPeriodOrdinal"]
@@ -115,6 +115,7 @@ class GameDayChannels:
         await config.channel(new_chn).to_delete.set(delete_gdc)
         gdc_state_updates = await config.guild(guild).gdc_state_updates()
         await config.channel(new_chn).game_states.set(gdc_state_updates)
+        bot.get_cog("Hockey").channel_router.invalidate(guild)
 
         # Gets the timezone to use for game day channel topic
         # timestamp = datetime.strptime(next_game.game_start, "%Y-%m-%dT%H:%M:%SZ")
@@ -178,3 +179,4 @@ class GameDayChannels:
             except Exception:
                 log.error("Cannot delete GDC channels")
         await config.guild(guild).gdc.set([])
+        bot.get_cog("Hockey").channel_router.invalidate(guild)
@@ -3,9 +3,8 @@ import asyncio
 from typing import List
 from datetime import datetime
 import discord
-from .helper import check_to_post, get_team
+from .helper import get_team
 from redbot.core.i18n import Translator
-from redbot.core import Config
 import logging
 
 try:
@@ -127,16 +126,10 @@ class Goal:
                 pass
         goal_embed = await self.goal_post_embed(game_data)
         goal_text = await self.goal_post_text(game_data)
-        tasks = []
-        for channels in await bot.get_cog("Hockey").config.all_channels():
-            channel = bot.get_channel(id=channels)
-            if channel is None:
-                await bot.get_cog("Hockey").config._clear_scope(Config.CHANNEL, str(channels))
-                log.info("{} channel was removed because it no longer exists".format(channels))
-                continue
-            should_post = await check_to_post(bot, channel, post_state, "Goal")
-            if should_post:
-                tasks.append(self.actually_post_goal(bot, channel, goal_embed, goal_text))
+        routes = await bot.get_cog("Hockey").channel_router.routes(post_state, "Goal")
+        tasks = [
+            self.actually_post_goal(bot, channel, goal_embed, goal_text) for channel in routes
+        ]
         data = await asyncio.gather(*tasks)
         for channel in data:
             if channel is None:
@@ -153,15 +146,15 @@ class Goal:
                         channel=channel, id=channel.id
                     ))
                 return
-            config = bot.get_cog("Hockey").config
-            game_day_channels = await config.guild(guild).gdc()
+            settings = await bot.get_cog("Hockey").channel_router.guild_settings(guild)
+            game_day_channels = settings.gdc
             # Don't want to ping people in the game day channels
             can_embed = channel.permissions_for(guild.me).embed_links
             can_manage_webhooks = (
                 False
             )  # channel.permissions_for(guild.me).manage_webhooks
             role = None
-            goal_notifications = await config.guild(guild).goal_notifications()
+            goal_notifications = settings.goal_notifications
             if goal_notifications:
                 log.debug(goal_notifications)
                 for roles in guild.roles:
@@ -229,8 +222,6 @@ class Goal:
         """
             Attempt to delete a goal if it was pulled back
         """
-        config = bot.get_cog("Hockey").config
-        team_list = await config.teams()
         team_data = await get_team(bot, team)
         if goal not in [goal.goal_id for goal in data.goals]:
             try:
@@ -254,10 +245,8 @@ class Goal:
                 else:
                     log.debug(_("Channel does not have permission to read history"))
             try:
-                team_list.remove(team_data)
                 del team_data["goal_id"][goal]
-                team_list.append(team_data)
-                await config.teams.set(team_list)
+                bot.get_cog("Hockey").team_store.save()
             except Exception:
                 log.error("Error removing team data", exc_info=True)
                 return
@@ -289,7 +278,8 @@ class Goal:
             except AttributeError:
                 message = await channel.get_message(message_id)
             guild = message.guild
-            game_day_channels = await bot.get_cog("Hockey").config.guild(guild).gdc()
+            settings = await bot.get_cog("Hockey").channel_router.guild_settings(guild)
+            game_day_channels = settings.gdc
             role = None
             for roles in guild.roles:
                 if roles.name == self.team_name + " GOAL":
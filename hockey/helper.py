@@ -2,7 +2,6 @@ import asyncio
 from datetime import datetime, timezone
 from redbot.core import Config
 from .constants import TEAMS, CONFIG_ID
-from .teamentry import TeamEntry
 from redbot.core.i18n import Translator
 import pytz
 import logging
@@ -168,24 +167,7 @@ async def get_team_role(guild, home_team, away_team):
 
 
 async def get_team(bot, team):
-    config = bot.get_cog("Hockey").config
-    return_team = None
-    team_list = await config.teams()
-    if team_list is None:
-        team_list = []
-        team_entry = TeamEntry("Null", team, 0, [], {}, [], "")
-        team_list.append(team_entry.to_json())
-        await config.teams.set(team_list)
-    for teams in team_list:
-        if team == teams["team_name"]:
-            return_team = team
-            return teams
-    if return_team is None:
-        # Add unknown teams to the config to track stats
-        return_team = TeamEntry("Null", team, 0, [], {}, [], "")
-        team_list.append(return_team.to_json())
-        await config.teams.set(team_list)
-        return await get_team(bot, team)
+    return await bot.get_cog("Hockey").team_store.get(team)
 
 
 async def check_valid_team(team_name, standings=False):
@@ -4,9 +4,10 @@ import asyncio
 import json
 import yaml
 import logging
+import time
 
 from io import BytesIO
-from typing import Union
+from typing import Dict, Optional, Union
 from datetime import datetime, timedelta, date
 from urllib.parse import quote
 from redbot.core import commands, checks, Config
@@ -20,10 +21,17 @@ from .embeds import make_rules_embed
 from .helper import HockeyStandings, HockeyTeams, get_season, HockeyStates
 from .errors import UserHasVotedError, VotingHasEndedError, NotAValidTeamError, InvalidFileError
 from .game import Game
+from .feeds import GameFeed
+from .teamstate import TeamStateStore
+from .routing import ChannelRouter
+from .leaderboard import LeaderboardStore
+from .pickemsindex import PickemsIndex
+from .pickemsjob import WeeklyPickemsJob
 from .pickems import Pickems
 from .standings import Standings
 from .gamedaychannels import GameDayChannels
 from .constants import BASE_URL, CONFIG_ID, TEAMS, HEADSHOT_URL
+from .api import get_client, FEED_TTL, ROSTER_TTL, SCHEDULE_TTL
 
 try:
     from .oilers import Oilers
@@ -48,13 +56,14 @@ class Hockey(commands.Cog):
     """
         Gather information and post goal updates for NHL hockey teams
     """
-    __version__ = "2.8.2"
+    __version__ = "2.9.1"
     __author__ = "TrustyJAID"
 
     def __init__(self, bot):
         self.bot = bot
         self.session = aiohttp.ClientSession(loop=self.bot.loop)
-        default_global = {"teams": [], "created_gdc": False, "print": False}
+        self.api = get_client()
+        default_global = {"teams": [], "created_gdc": False, "print": False, "pickems_job": {}}
         for team in TEAMS:
             team_entry = TeamEntry("Null", team, 0, [], {}, [], "")
             default_global["teams"].append(team_entry.to_json())
@@ -91,7 +100,13 @@ class Hockey(commands.Cog):
         self.config.register_channel(**default_channel, force_registration=True)
         self.loop = bot.loop.create_task(self.game_check_loop())
         self.TEST_LOOP = False  # used to test a continuous loop of a single game data
+        self.game_feeds: Dict[str, GameFeed] = {}
+        self.team_store = TeamStateStore(self.config, bot.loop)
+        self.channel_router = ChannelRouter(bot, self.config)
+        self.leaderboards = LeaderboardStore(self.config, bot.loop)
+        self.poll_limit = asyncio.Semaphore(8)
         self.all_pickems = {}
+        self.pickems_index = PickemsIndex()
         self.pickems_save_loop = bot.loop.create_task(self.save_pickems_data())
         self.save_pickems = True
 
@@ -107,9 +122,7 @@ class Hockey(commands.Cog):
         while self is self.bot.get_cog("Hockey"):
             # await self.refactor_data()
             try:
-                async with aiohttp.ClientSession() as session:
-                    async with session.get(BASE_URL + "/api/v1/schedule") as resp:
-                        data = await resp.json()
+                data = await self.api.get("/api/v1/schedule", SCHEDULE_TTL)
             except Exception:
                 log.debug(_("Error grabbing the schedule for today."), exc_info=True)
                 data = {"dates": []}
@@ -131,30 +144,28 @@ class Hockey(commands.Cog):
             while games != []:
                 to_remove = []
                 games_playing = True
-                for link in games:
-                    if not self.TEST_LOOP:
-                        try:
-                            async with aiohttp.ClientSession() as session:
-                                async with session.get(BASE_URL + link) as resp:
-                                    data = await resp.json()
-                        except Exception:
-                            log.error(_("Error grabbing game data: "), exc_info=True)
-                            continue
-                    else:
-                        games_playing = False
-                        with open(str(__file__)[:-9] + "testgame.json", "r") as infile:
-                            data = json.loads(infile.read())
-                    try:
-                        game = await Game.from_json(data)
-                    except Exception:
-                        log.error(_("Error creating game object from json."), exc_info=True)
+                poll_start = time.monotonic()
+                # Fetch every game at once so one slow feed doesn't hold up the rest
+                updates = await asyncio.gather(*[self.get_game_update(link) for link in games])
+                if self.TEST_LOOP:
+                    games_playing = False
+                try:
+                    await self.check_new_day()
+                except Exception:
+                    log.error("Error checking new day: ", exc_info=True)
+                # Every game has its own teams so their states can be checked together
+                checked = [(link, game) for link, game in zip(games, updates) if game is not None]
+                checks = [game.check_game_state(self.bot) for link, game in checked]
+                results = await asyncio.gather(*checks, return_exceptions=True)
+                for (link, game), result in zip(checked, results):
+                    if isinstance(result, Exception):
+                        log.error("Error checking game state: ", exc_info=result)
+                    elif link in self.game_feeds:
+                        # Only skip this feed while it's unchanged once it's been handled
+                        self.game_feeds[link].commit()
+                for link, game in zip(games, updates):
+                    if game is None:
                         continue
-                    try:
-                        await self.check_new_day()
-                        await game.check_game_state(self.bot)
-                    except Exception:
-                        log.error("Error checking game state: ", exc_info=True)
-
                     log.debug(
                         (
                             f"{game.away_team} @ {game.home_team} "
@@ -171,7 +182,8 @@ class Hockey(commands.Cog):
 
                 for link in to_remove:
                     games.remove(link)
-                await asyncio.sleep(60)
+                    self.game_feeds.pop(link, None)
+                await asyncio.sleep(max(0, 60 - (time.monotonic() - poll_start)))
             log.debug(_("Games Done Playing"))
             try:
                 await Pickems.tally_leaderboard(self.bot)
@@ -183,18 +195,41 @@ class Hockey(commands.Cog):
 
             # Final cleanup of config incase something went wrong
             # Should be mostly unnecessary at this point
-            all_teams = await self.config.teams()
-            for team in await self.config.teams():
-                all_teams.remove(team)
-                team["goal_id"] = {}
-                team["game_state"] = "Null"
-                team["game_start"] = ""
-                team["period"] = 0
-                all_teams.append(team)
-
-            await self.config.teams.set(all_teams)
+            await self.team_store.reset()
+            await self.team_store.flush()
             await asyncio.sleep(300)
 
+    async def get_game_update(self, link: str) -> Optional[Game]:
+        """
+            Fetch and parse the live feed for a game
+
+            Returns None if the feed could not be fetched or
+            nothing has changed since the last time we looked
+        """
+        async with self.poll_limit:
+            if not self.TEST_LOOP:
+                try:
+                    data = await self.api.get(link, FEED_TTL)
+                except Exception:
+                    log.error(_("Error grabbing game data: "), exc_info=True)
+                    return None
+            else:
+                with open(str(__file__)[:-9] + "testgame.json", "r") as infile:
+                    data = json.loads(infile.read())
+        if link not in self.game_feeds:
+            self.game_feeds[link] = GameFeed()
+        feed = self.game_feeds[link]
+        unchanged = feed.is_unchanged(data)
+        # Previews still need checking for the time until the game starts
+        if unchanged and not self.TEST_LOOP:
+            if data["gameData"]["status"]["abstractGameState"] != "Preview":
+                return None
+        try:
+            return await Game.from_json(data, feed)
+        except Exception:
+            log.error(_("Error creating game object from json."), exc_info=True)
+            return None
+
     async def check_new_day(self):
         if not await self.config.created_gdc():
             if datetime.now().weekday() == 6:
@@ -211,7 +246,7 @@ class Hockey(commands.Cog):
                         if await self.config.guild(guild).pickems_category():
                             guilds_to_make_new_pickems.append(guild)
 
-                    await Pickems.create_weekly_pickems_pages(self.bot, guilds_to_make_new_pickems, Game)
+                    await WeeklyPickemsJob(self.bot).run(guilds_to_make_new_pickems)
 
                 except Exception:
                     log.error(_("Error creating new weekly pickems pages"), exc_info=True)
@@ -237,6 +272,8 @@ class Hockey(commands.Cog):
             # pickems = [Pickems.from_json(p) for p in pickems_list]
             pickems = {name: Pickems.from_json(p) for name, p in pickems_list.items()}
             self.all_pickems[str(guild_id)] = pickems
+            for name, pickem in pickems.items():
+                self.pickems_index.add(guild_id, name, pickem)
 
     async def save_pickems_data(self):
         await self.bot.wait_until_ready()
@@ -255,7 +292,12 @@ class Hockey(commands.Cog):
             guild = channel.guild
         except Exception:
             return
-        if str(guild.id) not in self.all_pickems:
+        pickem = self.pickems_index.from_message(payload.message_id)
+        if pickem is None:
+            return
+        user = guild.get_member(payload.user_id)
+        # log.debug(payload.user_id)
+        if user is None or user.bot:
             return
         try:
             msg = await channel.fetch_message(id=payload.message_id)
@@ -263,40 +305,32 @@ class Hockey(commands.Cog):
             msg = await channel.get_message(id=payload.message_id)
         except discord.errors.NotFound:
             return
-        user = guild.get_member(payload.user_id)
-        # log.debug(payload.user_id)
-        if user.bot:
-            return
-        is_pickems_vote = False
-        for name, pickem in self.all_pickems[str(guild.id)].items():
-            if msg.id in pickem.message:
-                is_pickems_vote = True
-                reply_message = ""
-                try:
-                    # log.debug(payload.emoji)
-                    pickem.add_vote(user.id, payload.emoji)
-                except UserHasVotedError as team:
-                    if msg.channel.permissions_for(msg.guild.me).manage_messages:
-                        emoji = (
-                            pickem.home_emoji
-                            if str(payload.emoji.id) in pickem.away_emoji
-                            else pickem.away_emoji
-                        )
-                        await msg.remove_reaction(emoji, user)
-                    reply_message = _("You have already voted! Changing vote to: ") + str(team)
-                except VotingHasEndedError as error_msg:
-                    if msg.channel.permissions_for(msg.guild.me).manage_messages:
-                        await msg.remove_reaction(payload.emoji, user)
-                    reply_message = _("Voting has ended!") + str(error_msg)
-                except NotAValidTeamError:
-                    if msg.channel.permissions_for(msg.guild.me).manage_messages:
-                        await msg.remove_reaction(payload.emoji, user)
-                    reply_message = _("Don't clutter the voting message with emojis!")
-                if reply_message != "":
-                    try:
-                        await user.send(reply_message)
-                    except Exception:
-                        pass
+        reply_message = ""
+        try:
+            # log.debug(payload.emoji)
+            pickem.add_vote(user.id, payload.emoji)
+        except UserHasVotedError as team:
+            if msg.channel.permissions_for(msg.guild.me).manage_messages:
+                emoji = (
+                    pickem.home_emoji
+                    if str(payload.emoji.id) in pickem.away_emoji
+                    else pickem.away_emoji
+                )
+                await msg.remove_reaction(emoji, user)
+            reply_message = _("You have already voted! Changing vote to: ") + str(team)
+        except VotingHasEndedError as error_msg:
+            if msg.channel.permissions_for(msg.guild.me).manage_messages:
+                await msg.remove_reaction(payload.emoji, user)
+            reply_message = _("Voting has ended!") + str(error_msg)
+        except NotAValidTeamError:
+            if msg.channel.permissions_for(msg.guild.me).manage_messages:
+                await msg.remove_reaction(payload.emoji, user)
+            reply_message = _("Don't clutter the voting message with emojis!")
+        if reply_message != "":
+            try:
+                await user.send(reply_message)
+            except Exception:
+                pass
 
     async def change_custom_emojis(self, attachments):
         """
@@ -675,16 +709,10 @@ class Hockey(commands.Cog):
             weekly = season
         if total is None:
             total = season
-        leaderboard = await self.config.guild(ctx.guild).leaderboard()
-        if leaderboard == {} or leaderboard is None:
+        if not await self.leaderboards.get(ctx.guild):
             await ctx.send(_("There is no current leaderboard for this server!"))
             return
-        if str(user.id) not in leaderboard:
-            leaderboard[str(user.id)] = {"season": season, "weekly": weekly, "total": total}
-        else:
-            del leaderboard[str(user.id)]
-            leaderboard[str(user.id)] = {"season": season, "weekly": weekly, "total": total}
-        await self.config.guild(ctx.guild).leaderboard.set(leaderboard)
+        await self.leaderboards.set_user(ctx.guild, user.id, season, weekly, total)
         msg = (
             user.display_name
             + _(" now has ")
@@ -713,6 +741,7 @@ class Hockey(commands.Cog):
             if style.lower() != "auto":
                 return await ctx.send(_("That is not a valid style."))
         await self.config.guild(ctx.guild).goal_notifications.set(style)
+        self.channel_router.invalidate(ctx.guild)
         await ctx.tick()
 
     @hockeyset_commands.command(name="gamenotifications")
@@ -730,6 +759,7 @@ class Hockey(commands.Cog):
             if style.lower() != "auto":
                 return await ctx.send(_("That is not a valid style."))
         await self.config.guild(ctx.guild).game_state_notifications.set(style)
+        self.channel_router.invalidate(ctx.guild)
         await ctx.tick()
 
     @hockeyset_commands.command(name="poststandings", aliases=["poststanding"])
@@ -810,6 +840,7 @@ class Hockey(commands.Cog):
             `goal` is all the goal updates.
         """
         await self.config.channel(channel).game_states.set(list(set(state)))
+        self.channel_router.invalidate()
         await ctx.send(
             _("{channel} game updates set to {states}").format(
                 channel=channel.mention,
@@ -847,6 +878,7 @@ class Hockey(commands.Cog):
         else:
             cur_teams.append(team)
             await self.config.channel(channel).team.set(cur_teams)
+        self.channel_router.invalidate()
         await ctx.send(team + _(" goals will be posted in ") + channel.mention)
 
     @hockeyset_commands.command(name="del", aliases=["remove", "rem"])
@@ -865,6 +897,7 @@ class Hockey(commands.Cog):
             return
         if team is None:
             await self.config.channel(channel).clear()
+            self.channel_router.invalidate()
             await ctx.send(_("All goal updates will not be posted in ") + channel.mention)
             return
         if team is not None:
@@ -877,6 +910,7 @@ class Hockey(commands.Cog):
                 else:
                     await self.config.channel(channel).team.set(cur_teams)
                     await ctx.send(team + _(" goal updates removed from ") + channel.mention)
+                self.channel_router.invalidate()
 
     #######################################################################
     # All Basic Hockey Commands
@@ -1013,16 +1047,18 @@ class Hockey(commands.Cog):
         teams = [team for team in TEAMS if search.lower() in team.lower()]
         if teams != []:
             for team in teams:
-                url = f"{BASE_URL}/api/v1/teams/{TEAMS[team]['id']}/roster"
-                async with self.session.get(url) as resp:
-                    data = await resp.json()
+                url = f"/api/v1/teams/{TEAMS[team]['id']}/roster"
+                data = await self.api.get(url, ROSTER_TTL)
                 for player in data["roster"]:
                     players.append(player)
         else:
             for team in TEAMS:
-                url = f"{BASE_URL}/api/v1/teams/{TEAMS[team]['id']}/roster"
-                async with self.session.get(url) as resp:
-                    data = await resp.json()
+                url = f"/api/v1/teams/{TEAMS[team]['id']}/roster"
+                try:
+                    data = await self.api.get(url, ROSTER_TTL)
+                except Exception:
+                    log.debug(f"Error getting the {team} roster", exc_info=True)
+                    continue
                 try:
                     rosters[team] = data["roster"]
                 except KeyError:
@@ -1115,7 +1151,7 @@ class Hockey(commands.Cog):
 
         await self.config.guild(ctx.guild).pickems_category.set(category.id)
 
-        await Pickems.create_weekly_pickems_pages(self.bot, [ctx.guild], Game)
+        await WeeklyPickemsJob(self.bot).run([ctx.guild])
         await self.initialize_pickems()
         await ctx.send(_("I will now automatically create pickems pages every Sunday."))
 
@@ -1132,24 +1168,16 @@ class Hockey(commands.Cog):
         """
             Posts the leaderboard based on specific style
         """
-        leaderboard = await self.config.guild(ctx.guild).leaderboard()
-        if leaderboard == {} or leaderboard is None:
+        leaderboard = await self.leaderboards.ranked(ctx.guild, leaderboard_type)
+        if not leaderboard:
             await ctx.send(_("There is no current leaderboard for this server!"))
             return
-        if leaderboard_type != "worst":
-            leaderboard = sorted(
-                leaderboard.items(), key=lambda i: i[1][leaderboard_type], reverse=True
-            )
-        else:
-            leaderboard = sorted(
-                leaderboard.items(), key=lambda i: i[1]["total"] - i[1]["season"], reverse=True
-            )
         msg_list = []
         count = 1
         user_position = None
         for member_id in leaderboard:
             if str(member_id[0]) == str(ctx.author.id):
-                user_position = leaderboard.index(member_id)
+                user_position = count - 1
             member = ctx.guild.get_member(int(member_id[0]))
             if member is None:
                 member_mention = _("User has left the server ") + member_id[0]
@@ -1309,17 +1337,7 @@ class Hockey(commands.Cog):
         await game.check_game_state(self.bot)
         if (game.home_score + game.away_score) != 0:
             await game.check_team_goals(self.bot)
-        all_teams = await self.config.teams()
-        for team in await self.config.teams():
-            if team["team_name"] in [game.home_team, game.away_team]:
-                all_teams.remove(team)
-                team["goal_id"] = {}
-                team["game_state"] = "Null"
-                team["game_start"] = ""
-                team["period"] = 0
-                all_teams.append(team)
-
-        await self.config.teams.set(all_teams)
+        await self.team_store.reset([game.home_team, game.away_team])
         await ctx.send("Done testing.")
 
     @hockeyset_commands.command(hidden=True)
@@ -1470,16 +1488,8 @@ class Hockey(commands.Cog):
         """
             Resets the bots game data incase something goes wrong
         """
-        all_teams = await self.config.teams()
-        for team in await self.config.teams():
-            all_teams.remove(team)
-            team["goal_id"] = {}
-            team["game_state"] = "Null"
-            team["game_start"] = ""
-            team["period"] = 0
-            all_teams.append(team)
-
-        await self.config.teams.set(all_teams)
+        await self.team_store.reset()
+        await self.team_store.flush()
         await ctx.send(_("Saved game data reset."))
 
     @gdc.command()
@@ -1509,6 +1519,7 @@ class Hockey(commands.Cog):
             else:
                 good_channels.append(channel.id)
         await self.config.guild(guild).gdc.set(good_channels)
+        self.channel_router.invalidate()
 
     @hockeyset_commands.command()
     @checks.is_owner()
@@ -1524,6 +1535,7 @@ class Hockey(commands.Cog):
                 continue
             # if await self.config.channel(channel).to_delete():
             # await self.config._clear_scope(Config.CHANNEL, str(channels))
+        self.channel_router.invalidate()
         await ctx.send(_("Broken channels removed"))
 
     @hockeyset_commands.command()
@@ -1540,6 +1552,7 @@ class Hockey(commands.Cog):
             else:
                 if not await self.config.guild(guild).create_channels():
                     await self.config.guild(guild).gdc.set([])
+        self.channel_router.invalidate()
 
         await ctx.send(_("Saved servers the bot is no longer on have been removed."))
 
@@ -1551,12 +1564,7 @@ class Hockey(commands.Cog):
 
             May not be necessary anymore
         """
-        leaderboard = await self.config.guild(ctx.guild).leaderboard()
-        if leaderboard is None:
-            leaderboard = {}
-        for user in leaderboard:
-            leaderboard[str(user)]["weekly"] = 0
-        await self.config.guild(ctx.guild).leaderboard.set(leaderboard)
+        await self.leaderboards.reset_weekly(ctx.guild)
 
     @hockey_commands.command(hidden=True)
     @checks.is_owner()
@@ -1597,7 +1605,7 @@ class Hockey(commands.Cog):
         """
             Clears the servers pickems leaderboard
         """
-        await self.config.guild(ctx.guild).leaderboard.set({})
+        await self.leaderboards.clear(ctx.guild)
         await ctx.send(_("Server leaderboard reset."))
 
     async def save_pickems_unload(self):
@@ -1609,6 +1617,9 @@ class Hockey(commands.Cog):
 
     def cog_unload(self):
         self.bot.loop.create_task(self.session.close())
+        self.bot.loop.create_task(self.api.close())
+        self.bot.loop.create_task(self.team_store.close())
+        self.bot.loop.create_task(self.leaderboards.close())
         self.bot.loop.create_task(self.save_pickems_unload())
         if getattr(self, "loop", None) is not None:
             self.loop.cancel()
@@ -0,0 +1,109 @@
+import asyncio
+import logging
+import discord
+
+from typing import Dict, List, Optional, Set, Tuple
+
+log = logging.getLogger("red.trusty-cogs.Hockey")
+
+# user_id -> (correct picks, total picks)
+Results = Dict[int, Tuple[int, int]]
+
+
+def _worst(entry: dict) -> int:
+    return entry["total"] - entry["season"]
+
+
+SORT_KEYS = {
+    "season": lambda i: i[1]["season"],
+    "weekly": lambda i: i[1]["weekly"],
+    "worst": lambda i: _worst(i[1]),
+}
+
+
+class LeaderboardStore:
+    """
+        In memory copy of every guilds pickems leaderboard
+
+        Results from finished pickems are added to a guild in one go and
+        written to the config on a short delay so a day of games only saves
+        each guild once. Sorted leaderboards are kept until the guilds
+        leaderboard changes so posting one doesn't sort it every time.
+    """
+
+    def __init__(self, config, loop: asyncio.AbstractEventLoop, delay: float = 5.0):
+        self.config = config
+        self.loop = loop
+        self.delay = delay
+        self._boards: Dict[int, Dict[str, dict]] = {}
+        self._sorted: Dict[Tuple[int, str], List[Tuple[str, dict]]] = {}
+        self._dirty: Set[int] = set()
+        self._flush_task: Optional[asyncio.Task] = None
+
+    async def get(self, guild: discord.Guild) -> Dict[str, dict]:
+        if guild.id not in self._boards:
+            leaderboard = await self.config.guild(guild).leaderboard()
+            self._boards[guild.id] = leaderboard or {}
+        return self._boards[guild.id]
+
+    async def ranked(self, guild: discord.Guild, leaderboard_type: str) -> List[Tuple[str, dict]]:
+        """Returns the guilds leaderboard sorted best first for `leaderboard_type`"""
+        key = (guild.id, leaderboard_type)
+        if key not in self._sorted:
+            leaderboard = await self.get(guild)
+            self._sorted[key] = sorted(
+                leaderboard.items(), key=SORT_KEYS[leaderboard_type], reverse=True
+            )
+        return self._sorted[key]
+
+    def _changed(self, guild: discord.Guild):
+        for leaderboard_type in SORT_KEYS:
+            self._sorted.pop((guild.id, leaderboard_type), None)
+        self._dirty.add(guild.id)
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = self.loop.create_task(self._delayed_flush())
+
+    async def add_results(self, guild: discord.Guild, results: Results):
+        """Adds the correct and total picks for every user in one update"""
+        leaderboard = await self.get(guild)
+        for user_id, (correct, total) in results.items():
+            entry = leaderboard.setdefault(str(user_id), {"season": 0, "weekly": 0, "total": 0})
+            entry["season"] += correct
+            entry["weekly"] += correct
+            entry["total"] = entry.get("total", 0) + total
+        self._changed(guild)
+
+    async def set_user(self, guild: discord.Guild, user_id: int, season: int, weekly: int, total: int):
+        leaderboard = await self.get(guild)
+        leaderboard[str(user_id)] = {"season": season, "weekly": weekly, "total": total}
+        self._changed(guild)
+
+    async def reset_weekly(self, guild: discord.Guild):
+        leaderboard = await self.get(guild)
+        for entry in leaderboard.values():
+            entry["weekly"] = 0
+        self._changed(guild)
+
+    async def clear(self, guild: discord.Guild):
+        self._boards[guild.id] = {}
+        self._changed(guild)
+
+    async def _delayed_flush(self):
+        await asyncio.sleep(self.delay)
+        self._flush_task = None
+        try:
+            await self.flush()
+        except Exception:
+            log.error("Error saving pickems leaderboards", exc_info=True)
+
+    async def flush(self):
+        dirty, self._dirty = self._dirty, set()
+        for guild_id in dirty:
+            guild_obj = discord.Object(id=guild_id)
+            await self.config.guild(guild_obj).leaderboard.set(self._boards[guild_id])
+
+    async def close(self):
+        if self._flush_task is not None and not self._flush_task.done():
+            self._flush_task.cancel()
+        self._flush_task = None
+        await self.flush()
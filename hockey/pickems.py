@@ -1,6 +1,6 @@
 import discord
 from .errors import NotAValidTeamError, VotingHasEndedError, UserHasVotedError
-from datetime import datetime, timedelta
+from datetime import datetime
 from .constants import TEAMS
 from redbot.core.i18n import Translator
 import asyncio
@@ -53,8 +53,8 @@ class Pickems:
             team_choice = self.away_team
         if team_choice is None:
             raise NotAValidTeamError()
-        if str(user_id) in self.votes:
-            choice = self.votes[str(user_id)]
+        if user_id in self.votes:
+            choice = self.votes[user_id]
             if time_now > self.game_start:
                 if choice == self.home_team:
                     emoji = self.home_emoji
@@ -63,12 +63,12 @@ class Pickems:
                 raise VotingHasEndedError(_("You have voted for ") + f"<:{emoji}>")
             else:
                 if choice != team_choice:
-                    self.votes[str(user_id)] = team_choice
+                    self.votes[user_id] = team_choice
                     raise UserHasVotedError("{} {}".format(team, team_choice))
         if time_now > self.game_start:
             raise VotingHasEndedError(_("You did not vote on this game!"))
-        if str(user_id) not in self.votes:
-            self.votes[str(user_id)] = team_choice
+        if user_id not in self.votes:
+            self.votes[user_id] = team_choice
 
     @staticmethod
     def pickems_name(game):
@@ -90,31 +90,23 @@ class Pickems:
             Returns a list of all pickems on the bot for that game
         """
         return_pickems = []
-        new_name = f"{game.away_abr}@{game.home_abr}-{game.game_start.month}-{game.game_start.day}"
-        for guild_id, pickems in bot.get_cog("Hockey").all_pickems.items():
+        new_name = Pickems.pickems_name(game)
+        for guild_id, pickem in bot.get_cog("Hockey").pickems_index.guilds_with(new_name):
             guild = bot.get_guild(int(guild_id))
             if guild is None:
                 continue
-            if pickems is None:
-                pickems = []
-            if new_name in pickems:
-                return_pickems.append(pickems[new_name])
+            return_pickems.append(pickem)
 
         return return_pickems
 
     @staticmethod
     async def set_guild_pickem_winner(bot, game):
-        for guild_id, pickems in bot.get_cog("Hockey").all_pickems.items():
+        pickem_name = Pickems.pickems_name(game)
+        for guild_id, pickem in bot.get_cog("Hockey").pickems_index.guilds_with(pickem_name):
             guild = bot.get_guild(int(guild_id))
             if guild is None:
                 continue
-            if pickems is None:
-                pickems = {}
-            pickem_name = Pickems.pickems_name(game)
-            if pickem_name in pickems:
-                old_pickem = bot.get_cog("Hockey").all_pickems[str(guild_id)][pickem_name]
-                new_pickem = await old_pickem.set_pickem_winner(game)
-                bot.get_cog("Hockey").all_pickems[str(guild_id)][pickem_name] = new_pickem
+            await pickem.set_pickem_winner(game)
 
     @staticmethod
     async def create_pickem_object(bot, guild, message, channel, game):
@@ -151,6 +143,7 @@ class Pickems:
                 })
 
             bot.get_cog("Hockey").all_pickems[str(guild.id)] = pickems
+            bot.get_cog("Hockey").pickems_index.add(guild.id, new_name, pickems[new_name])
             log.debug("creating new pickems")
             return True
         else:
@@ -161,6 +154,7 @@ class Pickems:
             old_pickem.channel.append(message.id)
             pickems[old_name] = old_pickem
             bot.get_cog("Hockey").all_pickems[str(guild.id)] = pickems
+            bot.get_cog("Hockey").pickems_index.add_message(old_pickem, message.id)
             log.debug("using old pickems")
             return False
 
@@ -173,18 +167,13 @@ class Pickems:
             guild = bot.get_guild(id=guild_id)
             if guild is None:
                 continue
-            leaderboard = await config.guild(guild).leaderboard()
             try:
                 current_guild_pickem_channels = await config.guild(guild).pickems_channels()
                 if current_guild_pickem_channels:
                     pickems_channels_to_delete += current_guild_pickem_channels
             except Exception:
                 log.error(_("Error adding channels to delete"), exc_info=True)
-            if leaderboard is None:
-                leaderboard = {}
-            for user in leaderboard:
-                leaderboard[str(user)]["weekly"] = 0
-            await config.guild(guild).leaderboard.set(leaderboard)
+            await bot.get_cog("Hockey").leaderboards.reset_weekly(guild)
         try:
             await Pickems.delete_pickems_channels(bot, pickems_channels_to_delete)
         except Exception:
@@ -230,51 +219,6 @@ class Pickems:
             except Exception:
                 log.debug("Error adding reactions")
 
-    @staticmethod
-    async def create_weekly_pickems_pages(bot, guilds, game_obj):
-        config = bot.get_cog("Hockey").config
-        save_data = {}
-        today = datetime.now()
-        new_day = timedelta(days=1)
-        count = 0
-
-        while True:
-            chn_name = _("pickems-{month}-{day}").format(
-                month=today.month, day=today.day
-            )
-            data = []
-            for guild in guilds:
-                new_chn = await Pickems.create_pickems_channel(bot, chn_name, guild)
-                data.append(new_chn)
-
-            for new_channel in data:
-                if new_channel is None:
-                    continue
-                if new_channel.guild.id not in save_data:
-                    save_data[new_channel.guild.id] = [new_channel.id]
-                else:
-                    save_data[new_channel.guild.id].append(new_channel.id)
-
-            games_list = await game_obj.get_games(None, today, today)
-
-            for game in games_list:
-                for channel in data:
-                    if channel:
-                        await Pickems.create_pickems_game_msg(bot, channel, game)
-                        await asyncio.sleep(0.1)
-            # await asyncio.gather(*game_msg_tasks)
-            today = today + new_day
-            count += 1
-            if today.weekday() == 6 or count == 7:
-                # just incase we end up in an infinite loop somehow
-                # can never be too careful with async coding
-                break
-        for guild_id, channels in save_data.items():
-            guild = bot.get_guild(guild_id)
-            if not guild:
-                continue
-            await config.guild(guild).pickems_channels.set(channels)
-
     @staticmethod
     async def delete_pickems_channels(bot, channels):
         log.debug("Deleting pickems channels")
@@ -295,36 +239,28 @@ class Pickems:
             This should be where the pickems is removed and tallies are added
             to the leaderboard
         """
-        config = bot.get_cog("Hockey").config
+        leaderboards = bot.get_cog("Hockey").leaderboards
 
-        for guild_id, pickem_list in bot.get_cog("Hockey").all_pickems.items():
+        for guild_id, pickem_list in list(bot.get_cog("Hockey").all_pickems.items()):
             guild = bot.get_guild(id=int(guild_id))
             if guild is None:
                 continue
             try:
                 to_remove = []
-                for name, pickems in pickem_list.items():
-                    if pickems.winner is not None:
-                        to_remove.append(name)
-                        leaderboard = await config.guild(guild).leaderboard()
-                        if leaderboard is None:
-                            leaderboard = {}
-                        for user, choice in pickems.votes.items():
-                            if str(user) not in leaderboard:
-                                leaderboard[str(user)] = {"season": 0, "weekly": 0, "total": 0}
-                            if choice == pickems.winner:
-                                if str(user) not in leaderboard:
-                                    leaderboard[str(user)] = {"season": 1, "weekly": 1, "total": 0}
-                                else:
-                                    leaderboard[str(user)]["season"] += 1
-                                    leaderboard[str(user)]["weekly"] += 1
-                            if "total" not in leaderboard[str(user)]:
-                                leaderboard[str(user)]["total"] = 0
-                            leaderboard[str(user)]["total"] += 1
-                        await config.guild(guild).leaderboard.set(leaderboard)
+                results = {}
+                for name, pickems in list(pickem_list.items()):
+                    if pickems.winner is None:
+                        continue
+                    to_remove.append(name)
+                    for user_id, choice in pickems.votes.items():
+                        correct, total = results.get(user_id, (0, 0))
+                        results[user_id] = (correct + (choice == pickems.winner), total + 1)
+                if results:
+                    await leaderboards.add_results(guild, results)
                 for name in to_remove:
                     try:
                         del bot.get_cog("Hockey").all_pickems[str(guild_id)][name]
+                        bot.get_cog("Hockey").pickems_index.remove(guild_id, name)
                     except Exception:
                         log.error("Error removing pickems from memory", exc_info=True)
                 # await config.guild(guild).pickems.set(
@@ -332,6 +268,8 @@ class Pickems:
                 # )
             except Exception:
                 log.error(_("Error tallying leaderboard in ") + f"{guild.name}", exc_info=True)
+            # Let everything else run between guilds
+            await asyncio.sleep(0)
 
     def to_json(self) -> dict:
         return {
@@ -340,7 +278,7 @@ class Pickems:
             "game_start": self.game_start.strftime("%Y-%m-%dT%H:%M:%SZ"),
             "home_team": self.home_team,
             "away_team": self.away_team,
-            "votes": self.votes,
+            "votes": {str(user_id): choice for user_id, choice in self.votes.items()},
             "winner": self.winner,
         }
 
@@ -352,6 +290,6 @@ class Pickems:
             data["game_start"],
             data["home_team"],
             data["away_team"],
-            data["votes"],
+            {int(user_id): choice for user_id, choice in data["votes"].items()},
             data["winner"],
         )
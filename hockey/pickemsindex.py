@@ -0,0 +1,42 @@
+from typing import Dict, List, Optional, Tuple
+
+from .pickems import Pickems
+
+
+class PickemsIndex:
+    """
+        Lookups into the cogs `all_pickems` without scanning every guild
+
+        `by_name` maps a pickems name to the guilds that have it and
+        `by_message` maps every pickems message to its pickems.
+        Anything adding or removing pickems from `all_pickems` must
+        update this as well.
+    """
+
+    def __init__(self):
+        self.by_name: Dict[str, Dict[str, Pickems]] = {}
+        self.by_message: Dict[int, Pickems] = {}
+
+    def add(self, guild_id: str, name: str, pickem: Pickems):
+        self.by_name.setdefault(name, {})[str(guild_id)] = pickem
+        for message_id in pickem.message:
+            self.by_message[message_id] = pickem
+
+    def add_message(self, pickem: Pickems, message_id: int):
+        self.by_message[message_id] = pickem
+
+    def remove(self, guild_id: str, name: str):
+        pickem = self.by_name.get(name, {}).pop(str(guild_id), None)
+        if name in self.by_name and not self.by_name[name]:
+            del self.by_name[name]
+        if pickem is None:
+            return
+        for message_id in pickem.message:
+            if self.by_message.get(message_id) is pickem:
+                del self.by_message[message_id]
+
+    def guilds_with(self, name: str) -> List[Tuple[str, Pickems]]:
+        return list(self.by_name.get(name, {}).items())
+
+    def from_message(self, message_id: int) -> Optional[Pickems]:
+        return self.by_message.get(message_id)
@@ -0,0 +1,152 @@
+import asyncio
+import logging
+import time
+import discord
+
+from datetime import date, datetime, timedelta
+from typing import Dict, List
+
+from redbot.core.i18n import Translator
+
+from .api import get_client, SCHEDULE_TTL
+from .game import Game
+from .pickems import Pickems
+
+_ = Translator("Hockey", __file__)
+log = logging.getLogger("red.trusty-cogs.Hockey")
+
+# Discord rate limits channel creation and messages separately
+# so each gets its own limit on how many guilds can use it at once
+CHANNEL_CREATES = 5
+MESSAGE_POSTS = 10
+GAME_FETCHES = 8
+# Minimum seconds between saving progress
+SAVE_INTERVAL = 5
+
+
+class WeeklyPickemsJob:
+    """
+        Creates the weekly pickems channels and game messages
+
+        The whole weeks schedule is fetched once and every guild is worked
+        on at the same time. Each channel created and game message posted is
+        recorded in the `pickems_job` global so if the bot restarts partway
+        through the week the next run carries on from where it stopped
+        instead of creating everything again.
+    """
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.config = bot.get_cog("Hockey").config
+        self.channel_limit = asyncio.Semaphore(CHANNEL_CREATES)
+        self.message_limit = asyncio.Semaphore(MESSAGE_POSTS)
+        self.progress: dict = {}
+        self.guilds_done = 0
+        self.total_guilds = 0
+        self.started = 0.0
+        self._last_save: Dict[str, float] = {}
+
+    @staticmethod
+    def week_start(today: date) -> date:
+        """The Sunday the pickems week containing today started on"""
+        return today - timedelta(days=(today.weekday() + 1) % 7)
+
+    @staticmethod
+    def week_days(today: date) -> List[date]:
+        """Every day from today until the end of the pickems week on Saturday"""
+        days = [today]
+        while len(days) < 7 and (days[-1] + timedelta(days=1)).weekday() != 6:
+            days.append(days[-1] + timedelta(days=1))
+        return days
+
+    async def get_week_games(self, days: List[date]) -> Dict[str, List[Game]]:
+        start = days[0].strftime("%Y-%m-%d")
+        end = days[-1].strftime("%Y-%m-%d")
+        data = await get_client().get(
+            f"/api/v1/schedule?startDate={start}&endDate={end}", SCHEDULE_TTL
+        )
+        links = [(day["date"], game["link"]) for day in data["dates"] for game in day["games"]]
+        fetch_limit = asyncio.Semaphore(GAME_FETCHES)
+
+        async def fetch(link):
+            async with fetch_limit:
+                return await Game.from_url(link)
+
+        games = await asyncio.gather(*[fetch(link) for day, link in links])
+        week: Dict[str, List[Game]] = {day.strftime("%Y-%m-%d"): [] for day in days}
+        for (day, link), game in zip(links, games):
+            if game is not None and day in week:
+                week[day].append(game)
+        return week
+
+    async def save_progress(self, guild_id: str, force: bool = False):
+        """Save one guild's progress without touching any other run's guilds"""
+        if not force and time.monotonic() - self._last_save.get(guild_id, 0.0) < SAVE_INTERVAL:
+            return
+        self._last_save[guild_id] = time.monotonic()
+        await self.config.pickems_job.set_raw(
+            "guilds", guild_id, value=self.progress["guilds"][guild_id]
+        )
+
+    async def run(self, guilds: List[discord.Guild]):
+        self.started = time.monotonic()
+        today = datetime.now().date()
+        days = self.week_days(today)
+        week_id = self.week_start(today).strftime("%Y-%m-%d")
+        self.progress = await self.config.pickems_job()
+        if self.progress.get("week") != week_id:
+            # Anything left over is from an earlier week and can't be resumed
+            self.progress = {"week": week_id, "guilds": {}}
+            await self.config.pickems_job.set(self.progress)
+        elif any(str(guild.id) in self.progress["guilds"] for guild in guilds):
+            log.info("Resuming pickems pages for the week of {}".format(week_id))
+        week = await self.get_week_games(days)
+        self.total_guilds = len(guilds)
+        await asyncio.gather(*[self.run_guild(guild, days, week) for guild in guilds])
+        for guild in guilds:
+            self.progress["guilds"].pop(str(guild.id), None)
+            await self.config.pickems_job.clear_raw("guilds", str(guild.id))
+        log.info(
+            "Created pickems pages in {} guilds in {:.2f}s".format(
+                self.total_guilds, time.monotonic() - self.started
+            )
+        )
+
+    async def run_guild(self, guild: discord.Guild, days: List[date], week: Dict[str, List[Game]]):
+        state = self.progress["guilds"].setdefault(str(guild.id), {})
+        channels = []
+        try:
+            for day in days:
+                day_str = day.strftime("%Y-%m-%d")
+                day_state = state.get(day_str)
+                channel = None
+                if day_state is not None:
+                    channel = self.bot.get_channel(day_state["channel"])
+                if channel is None:
+                    chn_name = _("pickems-{month}-{day}").format(month=day.month, day=day.day)
+                    async with self.channel_limit:
+                        channel = await Pickems.create_pickems_channel(self.bot, chn_name, guild)
+                    if channel is None:
+                        continue
+                    day_state = {"channel": channel.id, "games": []}
+                    state[day_str] = day_state
+                    await self.save_progress(str(guild.id), force=True)
+                channels.append(channel.id)
+                for game in week[day_str]:
+                    pickems_name = Pickems.pickems_name(game)
+                    if pickems_name in day_state["games"]:
+                        continue
+                    async with self.message_limit:
+                        await Pickems.create_pickems_game_msg(self.bot, channel, game)
+                    day_state["games"].append(pickems_name)
+                    await self.save_progress(str(guild.id))
+            if channels:
+                await self.config.guild(guild).pickems_channels.set(channels)
+        except Exception:
+            log.error(_("Error creating pickems pages in ") + f"{guild.name}", exc_info=True)
+        self.guilds_done += 1
+        log.debug(
+            "Pickems pages {}/{} guilds done after {:.2f}s".format(
+                self.guilds_done, self.total_guilds, time.monotonic() - self.started
+            )
+        )
@@ -0,0 +1,103 @@
+import logging
+import discord
+
+from typing import Dict, List, Optional, Set, Tuple
+
+from redbot.core import Config
+
+log = logging.getLogger("red.trusty-cogs.Hockey")
+
+
+class ChannelRoute:
+    __slots__ = ("teams", "game_states")
+
+    def __init__(self, teams: List[str], game_states: List[str]):
+        self.teams = teams
+        self.game_states = game_states
+
+
+class GuildSettings:
+    __slots__ = ("gdc", "goal_notifications", "game_state_notifications")
+
+    def __init__(self, gdc: List[int], goal_notifications, game_state_notifications):
+        self.gdc = gdc
+        self.goal_notifications = goal_notifications
+        self.game_state_notifications = game_state_notifications
+
+
+class ChannelRouter:
+    """
+        Index of which channels want posts for which teams
+
+        The channel config is read once and kept as a mapping of team name
+        to channel ids so game states and goals can find every channel
+        they need to post in with a single lookup. The guild settings
+        used while posting are cached alongside it.
+        Anything changing channel or guild posting settings must call
+        `invalidate()` so the index is rebuilt on the next post.
+    """
+
+    def __init__(self, bot, config: Config):
+        self.bot = bot
+        self.config = config
+        self._channels: Optional[Dict[int, ChannelRoute]] = None
+        self._by_team: Dict[str, Set[int]] = {}
+        self._guilds: Dict[int, GuildSettings] = {}
+
+    def invalidate(self, guild: Optional[discord.Guild] = None):
+        self._channels = None
+        self._by_team = {}
+        if guild is None:
+            self._guilds = {}
+        else:
+            self._guilds.pop(guild.id, None)
+
+    async def _build(self) -> Tuple[Dict[int, ChannelRoute], Dict[str, Set[int]]]:
+        channels: Dict[int, ChannelRoute] = {}
+        by_team: Dict[str, Set[int]] = {}
+        for channel_id, data in (await self.config.all_channels()).items():
+            route = ChannelRoute(data.get("team") or [], data.get("game_states") or [])
+            channels[channel_id] = route
+            for team in route.teams:
+                by_team.setdefault(team, set()).add(channel_id)
+        self._channels = channels
+        self._by_team = by_team
+        return channels, by_team
+
+    async def routes(self, teams: List[str], game_state: str) -> Dict[discord.TextChannel, ChannelRoute]:
+        """
+            Returns every channel following any of `teams` that wants posts
+            for `game_state` along with that channels settings
+        """
+        # Keep our own references, invalidate() may run while we're awaiting
+        channels, by_team = self._channels, self._by_team
+        if channels is None:
+            channels, by_team = await self._build()
+        channel_ids: Set[int] = set()
+        for team in teams:
+            channel_ids.update(by_team.get(team, ()))
+        routes = {}
+        for channel_id in channel_ids:
+            route = channels[channel_id]
+            if game_state not in route.game_states:
+                continue
+            channel = self.bot.get_channel(id=channel_id)
+            if channel is None:
+                await self.config._clear_scope(Config.CHANNEL, str(channel_id))
+                log.info("{} channel was removed because it no longer exists".format(channel_id))
+                channels.pop(channel_id, None)
+                for team in route.teams:
+                    by_team.get(team, set()).discard(channel_id)
+                continue
+            routes[channel] = route
+        return routes
+
+    async def guild_settings(self, guild: discord.Guild) -> GuildSettings:
+        if guild.id not in self._guilds:
+            guild_config = self.config.guild(guild)
+            self._guilds[guild.id] = GuildSettings(
+                await guild_config.gdc() or [],
+                await guild_config.goal_notifications(),
+                await guild_config.game_state_notifications(),
+            )
+        return self._guilds[guild.id]
@@ -1,7 +1,10 @@
 from datetime import datetime
-import aiohttp
+import asyncio
 import discord
-from .constants import BASE_URL, TEAMS
+import time
+from typing import Dict, List, Optional, Tuple
+from .constants import TEAMS
+from .api import get_client, STANDINGS_TTL
 import logging
 
 log = logging.getLogger("red.trusty-cogs.Hockey")
@@ -76,63 +79,16 @@ class Standings:
             returns a list of standings objects and the location of the given
             style in the list
         """
-        async with aiohttp.ClientSession() as session:
-            async with session.get(BASE_URL + "/api/v1/standings") as resp:
-                data = await resp.json()
+        snapshot = await get_snapshot()
         conference = ["eastern", "western", "conference"]
         division = ["metropolitan", "atlantic", "pacific", "central", "division"]
-        if style.lower() in conference:
-            e = [
-                await Standings.from_json(
-                    team, record["division"]["name"], record["conference"]["name"]
-                )
-                for record in data["records"]
-                for team in record["teamRecords"]
-                if record["conference"]["name"] == "Eastern"
-            ]
-            w = [
-                await Standings.from_json(
-                    team, record["division"]["name"], record["conference"]["name"]
-                )
-                for record in data["records"]
-                for team in record["teamRecords"]
-                if record["conference"]["name"] == "Western"
-            ]
-
-            index = 0
-            for div in [e, w]:
-                if div[0].conference.lower() == style and style != "conference":
-                    index = [e, w].index(div)
-            return [e, w], index
-        if style.lower() in division:
-            new_list = []
-            for record in data["records"]:
-                new_list.append(
-                    [
-                        await Standings.from_json(
-                            team, record["division"]["name"], record["conference"]["name"]
-                        )
-                        for team in record["teamRecords"]
-                    ]
-                )
-            index = 0
-            for div in new_list:
-                if div[0].division.lower() == style and style != "division":
-                    index = new_list.index(div)
-            return new_list, index
+        style = style.lower()
+        if style in conference:
+            return snapshot.conferences, snapshot.conference_index.get(style, 0)
+        if style in division:
+            return snapshot.divisions, snapshot.division_index.get(style, 0)
         else:
-            all_teams = [
-                await Standings.from_json(
-                    team, record["division"]["name"], record["conference"]["name"]
-                )
-                for record in data["records"]
-                for team in record["teamRecords"]
-            ]
-            index = 0
-            for team in all_teams:
-                if team.name.lower() == style:
-                    index = all_teams.index(team)
-            return all_teams, index
+            return snapshot.teams, snapshot.team_index.get(style, 0)
 
     @staticmethod
     async def post_automatic_standings(bot):
@@ -143,39 +99,53 @@ class Standings:
         log.debug("Updating Standings.")
         config = bot.get_cog("Hockey").config
         all_guilds = await config.all_guilds()
+        tasks = []
         for guilds in all_guilds:
             guild = bot.get_guild(guilds)
             if guild is None:
                 continue
-            log.debug(guild.name)
-            if await config.guild(guild).post_standings():
+            tasks.append(Standings.update_guild_standings(config, guild))
+        # Fetch the standings once before every guild asks for them
+        await get_snapshot()
+        for result in await asyncio.gather(*tasks, return_exceptions=True):
+            if isinstance(result, Exception):
+                log.error("Error updating standings", exc_info=result)
 
-                search = await config.guild(guild).standings_type()
-                if search is None:
-                    continue
-                standings_channel = await config.guild(guild).standings_channel()
-                if standings_channel is None:
-                    continue
-                channel = bot.get_channel(standings_channel)
-                if channel is None:
-                    continue
-                standings_msg = await config.guild(guild).standings_msg()
-                if standings_msg is None:
-                    continue
-                try:
-                    message = await channel.fetch_message(standings_msg)
-                except AttributeError:
-                    message = await channel.get_message(standings_msg)
-                except discord.errors.NotFound:
-                    await config.guild(guild).post_standings.set(False)
+    @staticmethod
+    async def update_guild_standings(config, guild):
+        """
+            Edit a single guilds automatic standings message
+        """
+        log.debug(guild.name)
+        if not await config.guild(guild).post_standings():
+            return
+        search = await config.guild(guild).standings_type()
+        if search is None:
+            return
+        standings_channel = await config.guild(guild).standings_channel()
+        if standings_channel is None:
+            return
+        channel = guild.get_channel(standings_channel)
+        if channel is None:
+            return
+        standings_msg = await config.guild(guild).standings_msg()
+        if standings_msg is None:
+            return
+        try:
+            message = await channel.fetch_message(standings_msg)
+        except AttributeError:
+            message = await channel.get_message(standings_msg)
+        except discord.errors.NotFound:
+            await config.guild(guild).post_standings.set(False)
+            return
 
-                standings, page = await Standings.get_team_standings(search)
-                if search != "all":
-                    em = await Standings.build_standing_embed(standings, page)
-                else:
-                    em = await Standings.all_standing_embed(standings, page)
-                if message is not None:
-                    await message.edit(embed=em)
+        standings, page = await Standings.get_team_standings(search)
+        if search != "all":
+            em = await Standings.build_standing_embed(standings, page)
+        else:
+            em = await Standings.all_standing_embed(standings, page)
+        if message is not None:
+            await message.edit(embed=em)
 
     @classmethod
     async def from_json(cls, data: dict, division: str, conference: str):
@@ -210,6 +180,9 @@ class Standings:
         """
             Builds the standing embed when all TEAMS are selected
         """
+        cached = _cached_embed("all", post_standings, page)
+        if cached is not None:
+            return cached
         em = discord.Embed()
         new_dict = {}
         nhl_icon = "https://cdn.bleacherreport.net/images/team_logos/328x328/nhl.png"
@@ -236,13 +209,21 @@ class Standings:
         em.set_thumbnail(url=nhl_icon)
         em.timestamp = latest_timestamp
         em.set_footer(text="Stats Last Updated", icon_url=nhl_icon)
-        return em
+        return _cache_embed("all", post_standings, page, em)
 
     @staticmethod
     async def build_standing_embed(post_list, page=0):
         """
             Builds the standings type based on number of items in the list
         """
+        cached = _cached_embed("standings", post_list, page)
+        if cached is not None:
+            return cached
+        em = await Standings._build_standing_embed(post_list, page)
+        return _cache_embed("standings", post_list, page, em)
+
+    @staticmethod
+    async def _build_standing_embed(post_list, page=0):
         team_stats = post_list[page]
         em = discord.Embed()
         if type(team_stats) is not list:
@@ -325,3 +306,70 @@ class Standings:
             em.set_thumbnail(url=logo[conference])
             em.set_footer(text="Stats last Updated", icon_url=logo[conference])
             return em
+
+
+class StandingsSnapshot:
+    """
+        Parsed standings shared by everything showing standings
+
+        Holds the standings grouped every way they can be displayed
+        along with where each conference, division and team is in those
+        lists. Embeds built from these lists are kept until the next refresh.
+    """
+
+    def __init__(self, teams: List[Standings], expires: float):
+        self.expires = expires
+        self.teams = teams
+        self.team_index: Dict[str, int] = {t.name.lower(): i for i, t in enumerate(teams)}
+        self.conferences: List[List[Standings]] = [
+            [t for t in teams if t.conference == "Eastern"],
+            [t for t in teams if t.conference == "Western"],
+        ]
+        self.conference_index = {"eastern": 0, "western": 1}
+        self.divisions: List[List[Standings]] = []
+        self.division_index: Dict[str, int] = {}
+        for team in teams:
+            if team.division.lower() not in self.division_index:
+                self.division_index[team.division.lower()] = len(self.divisions)
+                self.divisions.append([])
+            self.divisions[self.division_index[team.division.lower()]].append(team)
+        self.embeds: Dict[Tuple[str, int, int], Tuple[list, discord.Embed]] = {}
+
+
+_snapshot: Optional[StandingsSnapshot] = None
+_refresh_lock = asyncio.Lock()
+
+
+async def get_snapshot() -> StandingsSnapshot:
+    """Returns the current standings refreshing them if they're out of date"""
+    global _snapshot
+    if _snapshot is not None and _snapshot.expires > time.monotonic():
+        return _snapshot
+    async with _refresh_lock:
+        if _snapshot is None or _snapshot.expires <= time.monotonic():
+            data = await get_client().get("/api/v1/standings", STANDINGS_TTL)
+            teams = [
+                await Standings.from_json(
+                    team, record["division"]["name"], record["conference"]["name"]
+                )
+                for record in data["records"]
+                for team in record["teamRecords"]
+            ]
+            _snapshot = StandingsSnapshot(teams, time.monotonic() + STANDINGS_TTL)
+    return _snapshot
+
+
+def _cached_embed(kind: str, post_list: list, page: int) -> Optional[discord.Embed]:
+    if _snapshot is None:
+        return None
+    cached = _snapshot.embeds.get((kind, id(post_list), page))
+    # Make sure the list is the same one and not a new one reusing its id
+    if cached is None or cached[0] is not post_list:
+        return None
+    return cached[1]
+
+
+def _cache_embed(kind: str, post_list: list, page: int, em: discord.Embed) -> discord.Embed:
+    if _snapshot is not None:
+        _snapshot.embeds[(kind, id(post_list), page)] = (post_list, em)
+    return em
@@ -0,0 +1,108 @@
+import asyncio
+import logging
+
+from contextlib import contextmanager
+from typing import Dict, Iterable, Optional
+
+from .teamentry import TeamEntry
+
+log = logging.getLogger("red.trusty-cogs.Hockey")
+
+
+class TeamStateStore:
+    """
+        In memory copy of the saved team game states
+
+        This is the source of truth while the cog is loaded. Team data is
+        looked up by name and edited in place, callers then call `save()`
+        which writes every change made in the next `delay` seconds to the
+        config at once. `flush()` writes immediately and is called on unload.
+    """
+
+    def __init__(self, config, loop: asyncio.AbstractEventLoop, delay: float = 5.0):
+        self.config = config
+        self.loop = loop
+        self.delay = delay
+        self._teams: Dict[str, dict] = {}
+        self._loaded = False
+        self._load_lock = asyncio.Lock()
+        self._flush_task: Optional[asyncio.Task] = None
+        self._batches = 0
+        self._save_pending = False
+
+    async def load(self):
+        if self._loaded:
+            return
+        async with self._load_lock:
+            if self._loaded:
+                return
+            team_list = await self.config.teams()
+            for team in team_list or []:
+                self._teams[team["team_name"]] = team
+            self._loaded = True
+
+    async def get(self, team: str) -> dict:
+        """Returns the saved data for a team adding unknown teams to track stats"""
+        await self.load()
+        if team not in self._teams:
+            self._teams[team] = TeamEntry("Null", team, 0, [], {}, [], "").to_json()
+            self.save()
+        return self._teams[team]
+
+    @contextmanager
+    def batch(self):
+        """
+            Hold back saves until the block is done
+
+            Anything saved inside the block is written once
+            after every open batch has finished.
+        """
+        self._batches += 1
+        try:
+            yield self
+        finally:
+            self._batches -= 1
+            if self._batches == 0 and self._save_pending:
+                self._save_pending = False
+                self.save()
+
+    def save(self):
+        """Schedule a write of all team data to the config"""
+        if self._batches:
+            self._save_pending = True
+            return
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = self.loop.create_task(self._delayed_flush())
+
+    async def _delayed_flush(self):
+        await asyncio.sleep(self.delay)
+        self._flush_task = None
+        try:
+            await self.flush()
+        except Exception:
+            log.error("Error saving team data", exc_info=True)
+
+    async def flush(self):
+        if not self._loaded:
+            return
+        await self.config.teams.set(list(self._teams.values()))
+
+    async def reset(self, teams: Optional[Iterable[str]] = None):
+        """Clears the saved game data for the given teams or every team"""
+        await self.load()
+        names = list(self._teams) if teams is None else teams
+        for name in names:
+            team = await self.get(name)
+            team["goal_id"] = {}
+            team["game_state"] = "Null"
+            team["game_start"] = ""
+            team["period"] = 0
+        self.save()
+
+    async def close(self):
+        self._batches = 0
+        self._save_pending = False
+        if self._flush_task is not None and not self._flush_task.done():
+            self._flush_task.cancel()
+        self._flush_task = None
+        await self.flush()
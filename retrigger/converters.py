@@ -254,6 +254,8 @@ class Trigger:
     text: Union[List[Union[int, str]], str, None]
     whitelist: list
     blacklist: list
+    whitelist_set: set
+    blacklist_set: set
     cooldown: dict
     multi_payload: Union[List[MultiResponse], Tuple[MultiResponse, ...]]
     created: int
@@ -288,6 +290,8 @@ class Trigger:
         self.text = text
         self.whitelist = whitelist
         self.blacklist = blacklist
+        self.whitelist_set = set(whitelist)
+        self.blacklist_set = set(blacklist)
         self.cooldown = cooldown
         self.multi_payload = multi_payload
         self.created_at = created_at
@@ -0,0 +1,50 @@
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+ImageKey = Tuple[int, str, Optional[int]]
+
+
+class ImageCache:
+    """
+        Keeps trigger images in memory
+
+        Entries are keyed by `(guild_id, image, size)` where size is `None` for
+        the original file and the resize multiplier for resized images.
+        The least recently used entries are dropped once the total size of
+        the cached images goes over `max_bytes`.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._images: "OrderedDict[ImageKey, bytes]" = OrderedDict()
+
+    def __len__(self):
+        return len(self._images)
+
+    def get(self, key: ImageKey) -> Optional[bytes]:
+        data = self._images.get(key)
+        if data is not None:
+            self._images.move_to_end(key)
+        return data
+
+    def put(self, key: ImageKey, data: bytes) -> None:
+        if len(data) > self.max_bytes:
+            # Don't flush the whole cache for one huge image
+            return
+        self.discard(key)
+        self._images[key] = data
+        self.total_bytes += len(data)
+        while self.total_bytes > self.max_bytes:
+            _key, old = self._images.popitem(last=False)
+            self.total_bytes -= len(old)
+
+    def discard(self, key: ImageKey) -> None:
+        old = self._images.pop(key, None)
+        if old is not None:
+            self.total_bytes -= len(old)
+
+    def discard_image(self, guild_id: int, image: str) -> None:
+        """Remove the original and every resized copy of an image"""
+        for key in [k for k in self._images if k[0] == guild_id and k[1] == image]:
+            self.discard(key)
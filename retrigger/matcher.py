@@ -0,0 +1,236 @@
+import re
+import time
+import logging
+
+from collections import OrderedDict
+from typing import Dict, FrozenSet, List, Optional, Pattern, Set, Tuple
+
+try:
+    from re import _parser as sre_parse  # Python 3.11+
+except ImportError:
+    import sre_parse  # type: ignore
+
+from .converters import Trigger
+
+log = logging.getLogger("red.trusty-cogs.ReTrigger")
+
+# Characters that IGNORECASE matches against an ascii letter but which
+# str.lower() leaves alone or turns into more than one character, we fold
+# them ourselves before lowering the rest
+CASE_FOLD = str.maketrans({"ſ": "s", "ı": "i", "İ": "i"})
+MAX_ALTERNATIVES = 32
+WORKER_CACHE_SIZE = 1024
+
+# Compiled patterns kept by each process pool worker between batches
+_worker_patterns: "OrderedDict[str, Pattern]" = OrderedDict()
+
+
+def _worker_compile(pattern: str) -> Pattern:
+    try:
+        regex = _worker_patterns.pop(pattern)
+    except KeyError:
+        regex = re.compile(pattern)
+        if len(_worker_patterns) >= WORKER_CACHE_SIZE:
+            _worker_patterns.popitem(last=False)
+    _worker_patterns[pattern] = regex
+    return regex
+
+
+def batch_findall(
+    content: str, patterns: List[Tuple[str, str]], timeout: float
+) -> Tuple[Dict[str, List[str]], List[str], Dict[str, float]]:
+    """
+        Run every pattern against one message inside a process pool worker
+
+        `patterns` is a list of `(trigger_name, pattern)` pairs. Returns a mapping
+        of trigger name to `findall` results, a list of trigger names whose
+        pattern took longer than `timeout` seconds, those are left out of the
+        results so the caller can evict them, and how long each pattern took.
+        Searching stops at the first pattern that matches since only one
+        trigger runs per message, anything after it is left out of all three.
+    """
+    results: Dict[str, List[str]] = {}
+    timed_out: List[str] = []
+    timings: Dict[str, float] = {}
+    for name, pattern in patterns:
+        start = time.perf_counter()
+        try:
+            search = _worker_compile(pattern).findall(content)
+        except re.error:
+            search = []
+        timings[name] = time.perf_counter() - start
+        if timings[name] > timeout:
+            timed_out.append(name)
+            continue
+        results[name] = search
+        if search:
+            break
+    return results, timed_out, timings
+
+
+def _best(requirements: List[FrozenSet[str]]) -> Optional[FrozenSet[str]]:
+    """
+        Pick the most selective requirement from a list
+
+        A requirement is a set of strings where at least one must appear
+        in the content for the pattern to possibly match. Longer shortest
+        strings and fewer alternatives are more selective.
+    """
+    best = None
+    for req in requirements:
+        if not req or any(not s for s in req):
+            continue
+        if best is None:
+            best = req
+            continue
+        if (min(len(s) for s in req), -len(req)) > (min(len(s) for s in best), -len(best)):
+            best = req
+    return best
+
+
+def _required(parsed, ignorecase: bool) -> Optional[FrozenSet[str]]:
+    """
+        Walk a parsed regex sequence and return a set of literal substrings
+        one of which must appear in any string the sequence matches.
+
+        Returns `None` when nothing can be safely required.
+    """
+    requirements: List[FrozenSet[str]] = []
+    run = ""
+
+    def end_run():
+        nonlocal run
+        if run:
+            requirements.append(frozenset([run]))
+        run = ""
+
+    for op, av in parsed:
+        if op is sre_parse.LITERAL:
+            char = chr(av)
+            if ignorecase:
+                if ord(char) > 127:
+                    end_run()
+                    continue
+                char = char.lower()
+            run += char
+            continue
+        end_run()
+        if op is sre_parse.SUBPATTERN:
+            add_flags, del_flags, sub = av[1], av[2], av[3]
+            if (add_flags | del_flags) & sre_parse.SRE_FLAG_IGNORECASE:
+                # scoped case changes are rare enough to not bother with
+                continue
+            req = _required(sub, ignorecase)
+            if req:
+                requirements.append(req)
+        elif op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT):
+            min_repeat, _max_repeat, sub = av
+            if min_repeat >= 1:
+                req = _required(sub, ignorecase)
+                if req:
+                    requirements.append(req)
+        elif op is sre_parse.BRANCH:
+            alternatives: Set[str] = set()
+            for branch in av[1]:
+                req = _required(branch, ignorecase)
+                if not req:
+                    alternatives = set()
+                    break
+                alternatives.update(req)
+            if alternatives and len(alternatives) <= MAX_ALTERNATIVES:
+                requirements.append(frozenset(alternatives))
+    end_run()
+    return _best(requirements)
+
+
+def required_literals(regex: Pattern) -> Optional[FrozenSet[str]]:
+    """
+        Find literal substrings that must be present for `regex` to match
+
+        If the pattern is case insensitive the returned literals are lowercase
+        and should be checked against content passed through `fold_content`.
+    """
+    if isinstance(regex.pattern, bytes):
+        return None
+    try:
+        parsed = sre_parse.parse(regex.pattern, regex.flags)
+    except Exception:
+        log.debug(f"Could not parse {regex.pattern} for a prefilter", exc_info=True)
+        return None
+    ignorecase = bool(parsed.state.flags & sre_parse.SRE_FLAG_IGNORECASE)
+    return _required(parsed, ignorecase)
+
+
+def fold_content(content: str) -> str:
+    return content.translate(CASE_FOLD).lower()
+
+
+class _MatcherEntry:
+    __slots__ = ("regex", "literals", "ignorecase")
+
+    def __init__(self, regex: Pattern):
+        self.regex = regex
+        self.literals = required_literals(regex)
+        self.ignorecase = bool(regex.flags & re.IGNORECASE)
+
+
+class TriggerMatcher:
+    """
+        Screens every trigger in a guild against a message at once
+
+        Each trigger's regex is reduced to the literal substrings it requires
+        to match. Triggers sharing a literal share one substring search per message
+        and only triggers whose literals are present need to be sent to the
+        process pool for the full regex search. Entries are built the first time
+        a trigger is seen and rebuilt when its regex changes so adding, editing
+        or removing a trigger never requires rebuilding the whole guild.
+    """
+
+    def __init__(self):
+        self._entries: Dict[str, _MatcherEntry] = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def discard(self, name: str) -> None:
+        self._entries.pop(name, None)
+
+    def _entry(self, trigger: Trigger) -> _MatcherEntry:
+        entry = self._entries.get(trigger.name)
+        if entry is None or entry.regex is not trigger.regex:
+            entry = _MatcherEntry(trigger.regex)
+            self._entries[trigger.name] = entry
+        return entry
+
+    def screen(self, triggers: List[Trigger], content: str) -> Set[str]:
+        """
+            Returns the names of triggers that cannot match `content`
+        """
+        misses: Set[str] = set()
+        found: Dict[str, bool] = {}
+        folded_found: Dict[str, bool] = {}
+        folded = None
+        for trigger in triggers:
+            entry = self._entry(trigger)
+            if entry.literals is None:
+                continue
+            if entry.ignorecase:
+                if folded is None:
+                    folded = fold_content(content)
+                text, cache = folded, folded_found
+            else:
+                text, cache = content, found
+            hit = False
+            for literal in entry.literals:
+                if literal not in cache:
+                    cache[literal] = literal in text
+                if cache[literal]:
+                    hit = True
+                    break
+            if not hit:
+                misses.add(trigger.name)
+        if len(self._entries) > len(triggers):
+            names = {t.name for t in triggers}
+            for name in [n for n in self._entries if n not in names]:
+                del self._entries[name]
+        return misses
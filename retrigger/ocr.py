@@ -0,0 +1,145 @@
+import asyncio
+import hashlib
+import logging
+import aiohttp
+
+from io import BytesIO
+from collections import OrderedDict
+from multiprocessing.pool import Pool
+from typing import Dict, List, Optional
+
+try:
+    from PIL import Image
+    import pytesseract
+
+    ALLOW_OCR = True
+except ImportError:
+    ALLOW_OCR = False
+
+
+log = logging.getLogger("red.trusty-cogs.ReTrigger")
+
+
+def image_to_text(data: bytes) -> str:
+    """Runs inside the OCR process pool"""
+    with Image.open(BytesIO(data)) as im:
+        return pytesseract.image_to_string(im)
+
+
+class ImageTextReader:
+    """
+        Reads text out of images for OCR triggers
+
+        Downloaded images are hashed so the same image posted under a different
+        URL is only read once. Results are kept in a bounded LRU cache keyed
+        by both URL and content hash which lets every OCR trigger and any edits
+        of the message reuse them. Images being downloaded or read are shared
+        with anyone else asking for the same URL at the same time.
+        OCR jobs run in a small dedicated process pool, anything beyond
+        `max_jobs` waits its turn.
+    """
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        max_jobs: int = 2,
+        max_size: int = 512,
+        timeout: int = 5,
+    ):
+        self.loop = loop
+        self.max_jobs = max_jobs
+        self.max_size = max_size
+        self.timeout = timeout
+        self.session: Optional[aiohttp.ClientSession] = None
+        self.pool: Optional[Pool] = None
+        self._jobs = asyncio.Semaphore(max_jobs)
+        self._urls: "OrderedDict[str, str]" = OrderedDict()
+        self._texts: "OrderedDict[str, str]" = OrderedDict()
+        self._pending: Dict[str, asyncio.Future] = {}
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.close()
+            self.loop.run_in_executor(None, self.pool.join)
+        if self.session is not None:
+            self.loop.create_task(self.session.close())
+
+    @staticmethod
+    def _remember(cache: "OrderedDict[str, str]", key: str, value: str, max_size: int):
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > max_size:
+            cache.popitem(last=False)
+
+    def _cached(self, url: str) -> Optional[str]:
+        digest = self._urls.get(url)
+        if digest is None or digest not in self._texts:
+            return None
+        self._urls.move_to_end(url)
+        self._texts.move_to_end(digest)
+        return self._texts[digest]
+
+    async def _download(self, url: str) -> bytes:
+        if self.session is None:
+            self.session = aiohttp.ClientSession()
+        async with self.session.get(url) as resp:
+            return await resp.read()
+
+    async def _ocr(self, data: bytes) -> str:
+        if self.pool is None:
+            self.pool = Pool(processes=self.max_jobs)
+        future = self.loop.create_future()
+
+        def _resolve(result):
+            if not future.done():
+                future.set_result(result)
+
+        def _error(error):
+            if not future.done():
+                future.set_exception(error)
+
+        async with self._jobs:
+            self.pool.apply_async(
+                image_to_text,
+                (data,),
+                callback=lambda r: self.loop.call_soon_threadsafe(_resolve, r),
+                error_callback=lambda e: self.loop.call_soon_threadsafe(_error, e),
+            )
+            return await asyncio.wait_for(future, timeout=self.timeout)
+
+    async def _read(self, url: str) -> str:
+        data = await self._download(url)
+        digest = hashlib.sha1(data).hexdigest()
+        if digest in self._texts:
+            text = self._texts[digest]
+        else:
+            text = await self._ocr(data)
+            self._remember(self._texts, digest, text, self.max_size)
+        self._remember(self._urls, url, digest, self.max_size)
+        return text
+
+    async def read(self, url: str) -> str:
+        """Returns the text found in the image at `url`"""
+        cached = self._cached(url)
+        if cached is not None:
+            return cached
+        if url in self._pending:
+            return await asyncio.shield(self._pending[url])
+        task = self.loop.create_task(self._read(url))
+        self._pending[url] = task
+        try:
+            return await asyncio.shield(task)
+        finally:
+            if task.done():
+                self._pending.pop(url, None)
+            else:
+                task.add_done_callback(lambda t: self._pending.pop(url, None))
+
+    async def read_all(self, urls: List[str]) -> str:
+        content = " "
+        for text in await asyncio.gather(*[self.read(u) for u in urls], return_exceptions=True):
+            if isinstance(text, Exception):
+                log.debug("Error reading text from image", exc_info=text)
+                continue
+            content += text
+        return content
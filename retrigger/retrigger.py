@@ -12,7 +12,7 @@ from redbot.core.i18n import Translator, cog_i18n
 from redbot.core.utils.predicates import ReactionPredicate
 from redbot.core.utils.menus import menu, DEFAULT_CONTROLS, start_adding_reactions
 # from redbot.core.utils import menus
-from redbot.core.utils.chat_formatting import humanize_list
+from redbot.core.utils.chat_formatting import humanize_list, box, pagify
 
 from .converters import (
     Trigger,
@@ -23,6 +23,9 @@ from .converters import (
     ChannelUserRole,
 )
 from .triggerhandler import TriggerHandler
+from .ocr import ImageTextReader
+from .image_cache import ImageCache
+from .stats import StatsTracker
 
 
 log = logging.getLogger("red.trusty-cogs.ReTrigger")
@@ -39,7 +42,7 @@ class ReTrigger(TriggerHandler, commands.Cog):
     """
 
     __author__ = "TrustyJAID"
-    __version__ = "2.8.9"
+    __version__ = "2.9.5"
 
     def __init__(self, bot):
         self.bot = bot
@@ -59,6 +62,10 @@ class ReTrigger(TriggerHandler, commands.Cog):
         self.config.register_global(trigger_timeout=1)
         self.re_pool = Pool(maxtasksperchild=2)
         self.triggers = {}
+        self.matchers = {}
+        self.ocr = ImageTextReader(self.bot.loop)
+        self.image_cache = ImageCache()
+        self.stats = StatsTracker()
         self.save_triggers = self.bot.loop.create_task(self.save_loop())
         self.__unload = self.cog_unload
         self.trigger_timeout = 1
@@ -74,6 +81,7 @@ class ReTrigger(TriggerHandler, commands.Cog):
         log.debug("Closing process pools.")
         self.re_pool.close()
         self.bot.loop.run_in_executor(None, self.re_pool.join)
+        self.ocr.close()
         self.save_triggers.cancel()
 
     async def initialize(self):
@@ -333,6 +341,7 @@ class ReTrigger(TriggerHandler, commands.Cog):
             if obj.id not in trigger.whitelist:
                 async with self.config.guild(ctx.guild).trigger_list() as trigger_list:
                     trigger.whitelist.append(obj.id)
+                    trigger.whitelist_set.add(obj.id)
                     trigger_list[trigger.name] = await trigger.to_json()
         await self.remove_trigger_from_cache(ctx.guild, trigger)
         self.triggers[ctx.guild.id].append(trigger)
@@ -367,6 +376,7 @@ class ReTrigger(TriggerHandler, commands.Cog):
             if obj.id in trigger.whitelist:
                 async with self.config.guild(ctx.guild).trigger_list() as trigger_list:
                     trigger.whitelist.remove(obj.id)
+                    trigger.whitelist_set.discard(obj.id)
                     trigger_list[trigger.name] = await trigger.to_json()
         await self.remove_trigger_from_cache(ctx.guild, trigger)
         self.triggers[ctx.guild.id].append(trigger)
@@ -398,6 +408,7 @@ class ReTrigger(TriggerHandler, commands.Cog):
             if obj.id not in trigger.blacklist:
                 async with self.config.guild(ctx.guild).trigger_list() as trigger_list:
                     trigger.blacklist.append(obj.id)
+                    trigger.blacklist_set.add(obj.id)
                     trigger_list[trigger.name] = await trigger.to_json()
         await self.remove_trigger_from_cache(ctx.guild, trigger)
         self.triggers[ctx.guild.id].append(trigger)
@@ -432,6 +443,7 @@ class ReTrigger(TriggerHandler, commands.Cog):
             if obj.id in trigger.blacklist:
                 async with self.config.guild(ctx.guild).trigger_list() as trigger_list:
                     trigger.blacklist.remove(obj.id)
+                    trigger.blacklist_set.discard(obj.id)
                     trigger_list[trigger.name] = await trigger.to_json()
         await self.remove_trigger_from_cache(ctx.guild, trigger)
         self.triggers[ctx.guild.id].append(trigger)
@@ -761,6 +773,43 @@ class ReTrigger(TriggerHandler, commands.Cog):
         # await menus.PagedMenu.send_and_wait(ctx, pages=triggers)
         # print("Hello, world.")
 
+    @retrigger.command(name="stats")
+    @checks.mod_or_permissions(manage_messages=True)
+    async def trigger_stats(self, ctx: commands.Context, amount: int = 10):
+        """
+            Show the slowest triggers on this server.
+
+            `[amount=10]` how many triggers to show.
+            Times are in milliseconds since the cog was last loaded.
+            Skipped is how often the trigger was ruled out without running the regex.
+        """
+        guild_stats = self.stats.guild_stats(ctx.guild.id)[: max(amount, 1)]
+        if not guild_stats:
+            return await ctx.send(_("No triggers have been checked on this server yet."))
+        msg = "{:<20} {:>7} {:>8} {:>7} {:>9} {:>8} {:>8} {:>9}\n".format(
+            _("Name"),
+            _("Checks"),
+            _("Skipped"),
+            _("Matches"),
+            _("Regex"),
+            _("p95"),
+            _("Perms"),
+            _("Response"),
+        )
+        for name, trigger_stats in guild_stats:
+            msg += "{:<20} {:>7} {:>8.0%} {:>7} {:>9.2f} {:>8.2f} {:>8.2f} {:>9.2f}\n".format(
+                name[:20],
+                trigger_stats.evaluations,
+                trigger_stats.skip_rate,
+                trigger_stats.matches,
+                trigger_stats.regex_time * 1000,
+                trigger_stats.p95 * 1000,
+                trigger_stats.perms_time * 1000,
+                trigger_stats.perform_time * 1000,
+            )
+        for page in pagify(msg, delims=["\n"], shorten_by=10):
+            await ctx.send(box(page, lang="text"))
+
     @retrigger.command(aliases=["del", "rem", "delete"])
     @checks.mod_or_permissions(manage_messages=True)
     async def remove(self, ctx: commands.Context, trigger: TriggerExists):
@@ -774,6 +823,7 @@ class ReTrigger(TriggerHandler, commands.Cog):
         if type(trigger) is Trigger:
             await self.remove_trigger(ctx.guild, trigger.name)
             await self.remove_trigger_from_cache(ctx.guild, trigger)
+            self.stats.discard(ctx.guild.id, trigger.name)
             await ctx.send(_("Trigger `") + trigger.name + _("` removed."))
         else:
             await ctx.send(_("Trigger `") + str(trigger) + _("` doesn't exist."))
@@ -0,0 +1,73 @@
+from collections import deque
+from typing import Deque, Dict, List, Tuple
+
+SAMPLE_SIZE = 100
+
+
+class TriggerStats:
+    """
+        Rolling performance numbers for a single trigger
+
+        Only the most recent `SAMPLE_SIZE` regex timings are kept for
+        the percentile, everything else is a running total.
+    """
+
+    __slots__ = (
+        "evaluations",
+        "skipped",
+        "searches",
+        "matches",
+        "regex_time",
+        "perms_time",
+        "perform_time",
+        "samples",
+    )
+
+    def __init__(self):
+        self.evaluations = 0
+        self.skipped = 0
+        self.searches = 0
+        self.matches = 0
+        self.regex_time = 0.0
+        self.perms_time = 0.0
+        self.perform_time = 0.0
+        self.samples: Deque[float] = deque(maxlen=SAMPLE_SIZE)
+
+    def add_search(self, elapsed: float) -> None:
+        self.searches += 1
+        self.regex_time += elapsed
+        self.samples.append(elapsed)
+
+    @property
+    def p95(self) -> float:
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+    @property
+    def skip_rate(self) -> float:
+        if not self.evaluations:
+            return 0.0
+        return self.skipped / self.evaluations
+
+
+class StatsTracker:
+    """Holds `TriggerStats` for every trigger since the cog was loaded"""
+
+    def __init__(self):
+        self._stats: Dict[Tuple[int, str], TriggerStats] = {}
+
+    def get(self, guild_id: int, name: str) -> TriggerStats:
+        key = (guild_id, name)
+        if key not in self._stats:
+            self._stats[key] = TriggerStats()
+        return self._stats[key]
+
+    def discard(self, guild_id: int, name: str) -> None:
+        self._stats.pop((guild_id, name), None)
+
+    def guild_stats(self, guild_id: int) -> List[Tuple[str, TriggerStats]]:
+        """Returns the stats for a guild slowest pattern first"""
+        stats = [(name, s) for (g_id, name), s in self._stats.items() if g_id == guild_id]
+        return sorted(stats, key=lambda x: (x[1].p95, x[1].regex_time), reverse=True)
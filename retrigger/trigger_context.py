@@ -0,0 +1,74 @@
+import discord
+
+from typing import Any, Dict, FrozenSet, cast
+
+from .converters import Trigger
+
+
+class TriggerContext:
+    """
+        Everything a trigger needs to know about a message to decide if it can run
+
+        Each lookup is only done the first time a trigger asks for it and
+        reused by every other trigger checking the same message.
+    """
+
+    __slots__ = ("handler", "message", "guild", "author", "channel", "ids", "_cache")
+
+    def __init__(self, handler: Any, message: discord.Message):
+        self.handler = handler
+        self.message = message
+        self.guild: discord.Guild = cast(discord.Guild, message.guild)
+        self.author: discord.Member = cast(discord.Member, message.author)
+        self.channel: discord.TextChannel = cast(discord.TextChannel, message.channel)
+        ids = [r.id for r in getattr(self.author, "roles", []) if not r.is_default()]
+        ids.append(self.author.id)
+        ids.append(self.channel.id)
+        self.ids: FrozenSet[int] = frozenset(ids)
+        self._cache: Dict[str, Any] = {}
+
+    def allowed_by(self, trigger: Trigger) -> bool:
+        """Check the triggers whitelist and blacklist against this message"""
+        if trigger.whitelist_set:
+            return not trigger.whitelist_set.isdisjoint(self.ids)
+        return trigger.blacklist_set.isdisjoint(self.ids)
+
+    @property
+    def channel_perms(self) -> discord.Permissions:
+        if "channel_perms" not in self._cache:
+            self._cache["channel_perms"] = self.channel.permissions_for(self.author)
+        return self._cache["channel_perms"]
+
+    async def blacklisted(self) -> bool:
+        """True if the channel or author are locally or globally blacklisted"""
+        if "blacklisted" not in self._cache:
+            self._cache["blacklisted"] = (
+                not await self.handler.local_perms(self.message)
+                or not await self.handler.global_perms(self.message)
+            )
+        return self._cache["blacklisted"]
+
+    async def is_command(self) -> bool:
+        if "is_command" not in self._cache:
+            self._cache["is_command"] = await self.handler.check_is_command(self.message)
+        return self._cache["is_command"]
+
+    async def is_mod(self) -> bool:
+        if "is_mod" not in self._cache:
+            self._cache["is_mod"] = await self.handler.is_mod_or_admin(self.author)
+        return self._cache["is_mod"]
+
+    async def is_immune(self) -> bool:
+        """Check if the author is immune from automated mod actions"""
+        if "is_immune" not in self._cache:
+            autoimmune = getattr(self.handler.bot, "is_automod_immune", None)
+            immune = False
+            if autoimmune is not None:
+                immune = await autoimmune(self.message)
+            self._cache["is_immune"] = immune
+        return self._cache["is_immune"]
+
+    async def bypass(self) -> bool:
+        if "bypass" not in self._cache:
+            self._cache["bypass"] = await self.handler.config.guild(self.guild).bypass()
+        return self._cache["bypass"]
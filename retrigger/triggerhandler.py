@@ -7,11 +7,12 @@ import random
 import string
 import os
 import re
+import time
 
 from io import BytesIO
 from copy import copy
 from datetime import datetime
-from typing import List, Union, Pattern, cast, Dict
+from typing import List, Union, Pattern, cast, Dict, Tuple, Optional
 
 from redbot.core.bot import Red
 from redbot.core import commands, Config, modlog
@@ -25,19 +26,18 @@ from multiprocessing import TimeoutError
 from multiprocessing.pool import Pool
 
 from .converters import Trigger, ChannelUserRole
+from .matcher import TriggerMatcher, batch_findall
+from .trigger_context import TriggerContext
+from .ocr import ImageTextReader, ALLOW_OCR
+from .image_cache import ImageCache
+from .stats import StatsTracker
 
 try:
     from PIL import Image
-    try:
-        import pytesseract
-        ALLOW_OCR = True
-    except ImportError:
-        ALLOW_OCR = False
 
     ALLOW_RESIZE = True
 except ImportError:
     ALLOW_RESIZE = False
-    ALLOW_OCR = False
 
 
 log = logging.getLogger("red.trusty-cogs.ReTrigger")
@@ -64,6 +64,10 @@ class TriggerHandler:
     bot: Red
     re_pool: Pool
     triggers: Dict[int, List[Trigger]]
+    matchers: Dict[int, TriggerMatcher]
+    ocr: ImageTextReader
+    image_cache: ImageCache
+    stats: StatsTracker
     trigger_timeout: int
     ALLOW_RESIZE: bool = ALLOW_RESIZE
     ALLOW_OCR: bool = ALLOW_OCR
@@ -73,11 +77,17 @@ class TriggerHandler:
         self.bot: Red
         self.re_pool: Pool
         self.triggers: Dict[int, List[Trigger]]
+        self.matchers: Dict[int, TriggerMatcher]
+        self.ocr: ImageTextReader
+        self.image_cache: ImageCache
+        self.stats: StatsTracker
         self.trigger_timeout: int
         self.ALLOW_RESIZE = ALLOW_RESIZE
         self.ALLOW_OCR = ALLOW_OCR
 
     async def remove_trigger_from_cache(self, guild: discord.Guild, trigger: Trigger):
+        if guild.id in self.matchers:
+            self.matchers[guild.id].discard(trigger.name)
         try:
             for t in self.triggers[guild.id]:
                 if t.name == trigger.name:
@@ -140,33 +150,6 @@ class TriggerHandler:
         except AttributeError:
             return await self.bot.allowed_by_whitelist_blacklist(message.author)
 
-    async def check_bw_list(self, trigger: Trigger, message: discord.Message) -> bool:
-        can_run = True
-        author: discord.Member = cast(discord.Member, message.author)
-        if trigger.whitelist:
-            can_run = False
-            if message.channel.id in trigger.whitelist:
-                can_run = True
-            if message.author.id in trigger.whitelist:
-                can_run = True
-            for role in author.roles:
-                if role.is_default():
-                    continue
-                if role.id in trigger.whitelist:
-                    can_run = True
-            return can_run
-        else:
-            if message.channel.id in trigger.blacklist:
-                can_run = False
-            if message.author.id in trigger.blacklist:
-                can_run = False
-            for role in author.roles:
-                if role.is_default():
-                    continue
-                if role.id in trigger.blacklist:
-                    can_run = False
-        return can_run
-
     async def is_mod_or_admin(self, member: discord.Member) -> bool:
         guild = member.guild
         if member == guild.owner:
@@ -273,16 +256,41 @@ class TriggerHandler:
             else:
                 responses.append(message.content)
 
-    def resize_image(self, size: int, image: str) -> discord.File:
+    def resize_image(self, size: int, image: bytes) -> bytes:
         length, width = (16, 16)  # Start with the smallest size we want to upload
-        with Image.open(image) as im:
+        with Image.open(BytesIO(image)) as im:
             if size <= 0:
                 size = 1
             im.thumbnail((length * size, width * size), Image.ANTIALIAS)
             byte_array = BytesIO()
             im.save(byte_array, format="PNG")
-            byte_array.seek(0)
-            return discord.File(byte_array, filename="resize.png")
+            return byte_array.getvalue()
+
+    @staticmethod
+    def read_image(path: str) -> bytes:
+        with open(path, "rb") as f:
+            return f.read()
+
+    async def get_image(self, guild: discord.Guild, image: str) -> bytes:
+        """Get a saved trigger image from memory, loading it from disk if needed"""
+        data = self.image_cache.get((guild.id, image, None))
+        if data is None:
+            path = str(cog_data_path(self)) + f"/{guild.id}/{image}"
+            data = await self.bot.loop.run_in_executor(None, self.read_image, path)
+            self.image_cache.put((guild.id, image, None), data)
+        return data
+
+    async def get_resized_image(self, guild: discord.Guild, image: str, size: int) -> bytes:
+        """Get a resized trigger image rendering it only if it isn't cached"""
+        size = max(size, 1)
+        data = self.image_cache.get((guild.id, image, size))
+        if data is None:
+            original = await self.get_image(guild, image)
+            task = functools.partial(self.resize_image, size=size, image=original)
+            new_task = self.bot.loop.run_in_executor(None, task)
+            data = await asyncio.wait_for(new_task, timeout=60)
+            self.image_cache.put((guild.id, image, size), data)
+        return data
 
     async def trigger_embed(
         self, ctx: commands.Context, trigger_list: List[dict]
@@ -527,17 +535,15 @@ class TriggerHandler:
         guild: discord.Guild = cast(discord.Guild, message.guild)
         if guild.id not in self.triggers:
             return
-        channel: discord.TextChannel = cast(discord.TextChannel, message.channel)
-        author: discord.Member = cast(discord.Member, message.author)
-
-        local_perms = not await self.local_perms(message)
-        global_perms = not await self.global_perms(message)
-        channel_perms = channel.permissions_for(author)
-        is_command = await self.check_is_command(message)
-        is_mod = await self.is_mod_or_admin(author)
-
-        autoimmune = getattr(self.bot, "is_automod_immune", None)
-        auto_mod = ["delete", "kick", "ban", "add_role", "remove_role"]
+        context = TriggerContext(self, message)
+
+        if guild.id not in self.matchers:
+            self.matchers[guild.id] = TriggerMatcher()
+        # Triggers whose required literals are missing from the message
+        # can never match so we can skip sending them to the process pool
+        misses = self.matchers[guild.id].screen(self.triggers[guild.id], message.content)
+        eligible: List[Tuple[Trigger, bool]] = []
+        image_text: Optional[str] = None
         # async with self.config.guild(guild).trigger_list() as trigger_list:
         for trigger in self.triggers[guild.id]:
             # log.debug(triggers)
@@ -547,60 +553,37 @@ class TriggerHandler:
             # continue
             if edit and trigger.ignore_edits:
                 continue
-
-            allowed_trigger = await self.check_bw_list(trigger, message)
-            is_auto_mod = trigger.response_type in auto_mod
-            if not allowed_trigger:
-                continue
-            if allowed_trigger and (is_auto_mod and is_mod):
-                continue
-            log.debug(f"Checking trigger {trigger.name}")
-            if is_command and not trigger.ignore_commands:
+            extra_content = bool(
+                ("delete" in trigger.response_type and trigger.text)
+                or (trigger.ocr_search and ALLOW_OCR)
+            )
+            stats = self.stats.get(guild.id, trigger.name)
+            stats.evaluations += 1
+            if not extra_content and trigger.name in misses:
+                stats.skipped += 1
+                log.debug(f"Skipping trigger {trigger.name} required text not found")
                 continue
 
-            if any(t for t in trigger.response_type if t in auto_mod):
-                if await autoimmune(message):
-                    print_msg = _(
-                        "ReTrigger: {author} is immune from automated actions "
-                    ).format(author=author)
-                    log.debug(print_msg + trigger.name)
-                    continue
-            if "delete" in trigger.response_type:
-                if channel_perms.manage_messages or is_mod:
-                    print_msg = _(
-                        "ReTrigger: Delete is ignored because {author} "
-                        "has manage messages permission "
-                    ).format(author=author)
-                    log.debug(print_msg + trigger.name)
-                    continue
-            elif "kick" in trigger.response_type:
-                if channel_perms.kick_members or is_mod:
-                    print_msg = _(
-                        "ReTrigger: Kick is ignored because {author} has kick permissions "
-                    ).format(author=author)
-                    log.debug(print_msg + trigger.name)
-                    continue
-            elif "ban" in trigger.response_type:
-                if channel_perms.ban_members or is_mod:
-                    print_msg = _(
-                        "ReTrigger: Ban is ignored because {author} has ban permissions "
-                    ).format(author=author)
-                    log.debug(print_msg + trigger.name)
-                    continue
-            elif any(t for t in trigger.response_type if t in ["add_role", "remove_role"]):
-                if channel_perms.manage_roles or is_mod:
-                    print_msg = _(
-                        "ReTrigger: role change is ignored because {author} "
-                        "has mange roles permissions "
-                    ).format(author=author)
-                    log.debug(print_msg + trigger.name)
-            else:
-                if any([local_perms, global_perms]):
-                    print_msg = _(
-                        "ReTrigger: Channel is ignored or {author} is blacklisted "
-                    ).format(author=author)
-                    log.debug(print_msg + trigger.name)
-                    continue
+            start = time.perf_counter()
+            allowed = await self.can_run_trigger(trigger, context)
+            stats.perms_time += time.perf_counter() - start
+            if not allowed:
+                continue
+            eligible.append((trigger, extra_content))
+
+        # Everything searching the plain message content goes to the
+        # process pool in a single batch, OCR and filename searches
+        # still have their own content and are searched individually
+        batch = [t for t, extra_content in eligible if not extra_content]
+        results, evicted = await self.safe_regex_batch(
+            guild, batch, message.content, await context.bypass() if batch else False
+        )
+        for trigger in evicted:
+            await self.remove_trigger_from_cache(guild, trigger)
+        for trigger, extra_content in eligible:
+            if trigger in evicted:
+                # we certainly don't want to be performing multiple triggers if this happens
+                return
             content = message.content
             if "delete" in trigger.response_type and trigger.text:
                 content = (
@@ -608,48 +591,104 @@ class TriggerHandler:
                 )
 
             if trigger.ocr_search and ALLOW_OCR:
-                content += await self.get_image_text(message)
+                if image_text is None:
+                    image_text = await self.get_image_text(message)
+                content += image_text
 
-            search = await self.safe_regex_search(guild, trigger, content)
+            stats = self.stats.get(guild.id, trigger.name)
+            if trigger.name in results:
+                search = (True, results[trigger.name])
+            else:
+                search = await self.safe_regex_search(
+                    guild, trigger, content, await context.bypass()
+                )
             if not search[0]:
-                self.triggers[guild.id].remove(trigger)
+                await self.remove_trigger_from_cache(guild, trigger)
                 return
             elif search[0] and search[1] != []:
                 if await self.check_trigger_cooldown(message, trigger):
                     continue
                 trigger.count += 1
+                stats.matches += 1
+                start = time.perf_counter()
                 await self.perform_trigger(message, trigger, search[1])
+                stats.perform_time += time.perf_counter() - start
                 return
 
+    async def can_run_trigger(self, trigger: Trigger, context: TriggerContext) -> bool:
+        """Checks the trigger is allowed to run on the message in this context"""
+        author = context.author
+        auto_mod = ["delete", "kick", "ban", "add_role", "remove_role"]
+        allowed_trigger = context.allowed_by(trigger)
+        is_auto_mod = trigger.response_type in auto_mod
+        if not allowed_trigger:
+            return False
+        if allowed_trigger and (is_auto_mod and await context.is_mod()):
+            return False
+        log.debug(f"Checking trigger {trigger.name}")
+        if not trigger.ignore_commands and await context.is_command():
+            return False
+
+        if any(t for t in trigger.response_type if t in auto_mod):
+            if await context.is_immune():
+                print_msg = _(
+                    "ReTrigger: {author} is immune from automated actions "
+                ).format(author=author)
+                log.debug(print_msg + trigger.name)
+                return False
+        if "delete" in trigger.response_type:
+            if context.channel_perms.manage_messages or await context.is_mod():
+                print_msg = _(
+                    "ReTrigger: Delete is ignored because {author} "
+                    "has manage messages permission "
+                ).format(author=author)
+                log.debug(print_msg + trigger.name)
+                return False
+        elif "kick" in trigger.response_type:
+            if context.channel_perms.kick_members or await context.is_mod():
+                print_msg = _(
+                    "ReTrigger: Kick is ignored because {author} has kick permissions "
+                ).format(author=author)
+                log.debug(print_msg + trigger.name)
+                return False
+        elif "ban" in trigger.response_type:
+            if context.channel_perms.ban_members or await context.is_mod():
+                print_msg = _(
+                    "ReTrigger: Ban is ignored because {author} has ban permissions "
+                ).format(author=author)
+                log.debug(print_msg + trigger.name)
+                return False
+        elif any(t for t in trigger.response_type if t in ["add_role", "remove_role"]):
+            if context.channel_perms.manage_roles or await context.is_mod():
+                print_msg = _(
+                    "ReTrigger: role change is ignored because {author} "
+                    "has mange roles permissions "
+                ).format(author=author)
+                log.debug(print_msg + trigger.name)
+        else:
+            if await context.blacklisted():
+                print_msg = _(
+                    "ReTrigger: Channel is ignored or {author} is blacklisted "
+                ).format(author=author)
+                log.debug(print_msg + trigger.name)
+                return False
+        return True
+
     async def get_image_text(self, message: discord.Message) -> str:
         """
             This function is built to asynchronously search images for text using pytesseract
 
             It takes a discord message and searches for valid image links and all attachments on the message
             then runs them through pytesseract. All contents from pytesseract are returned as a string.
+            Results are cached by the OCR reader so repeated or reposted images are only read once.
         """
-        content = " "
-        for attachment in message.attachments:
-            temp = BytesIO()
-            await attachment.save(temp)
-            temp.seek(0)
-            task = functools.partial(pytesseract.image_to_string, Image.open(temp))
-            new_task = self.bot.loop.run_in_executor(None, task)
-            content += await asyncio.wait_for(new_task, timeout=5)
-        good_image_url = IMAGE_REGEX.findall(message.content)
-        for link in good_image_url:
-            temp = BytesIO()
-            async with aiohttp.ClientSession() as session:
-                async with session.get(link) as resp:
-                    data = await resp.read()
-                    temp.write(data)
-                    temp.seek(0)
-            task = functools.partial(pytesseract.image_to_string, Image.open(temp))
-            new_task = self.bot.loop.run_in_executor(None, task)
-            content += await asyncio.wait_for(new_task, timeout=5)
-        return content
+        urls = [a.url for a in message.attachments]
+        urls += IMAGE_REGEX.findall(message.content)
+        return await self.ocr.read_all(urls)
 
-    async def safe_regex_search(self, guild: discord.Guild, trigger: Trigger, content: str):
+    async def safe_regex_search(
+        self, guild: discord.Guild, trigger: Trigger, content: str, bypass: Optional[bool] = None
+    ):
         """
             Mostly safe regex search to prevent reDOS from user defined regex patterns
 
@@ -658,14 +697,21 @@ class TriggerHandler:
             things asynchronous. If the process takes too long to complete we log a
             warning and remove the trigger from trying to run again.
         """
-        if await self.config.guild(guild).bypass():
+        if bypass is None:
+            bypass = await self.config.guild(guild).bypass()
+        stats = self.stats.get(guild.id, trigger.name)
+        start = time.perf_counter()
+        if bypass:
             log.debug(f"Bypassing safe regex in guild {guild.name} ({guild.id})")
-            return (True, trigger.regex.findall(content))
+            search = trigger.regex.findall(content)
+            stats.add_search(time.perf_counter() - start)
+            return (True, search)
         try:
             process = self.re_pool.apply_async(trigger.regex.findall, (content,))
             task = functools.partial(process.get, timeout=self.trigger_timeout)
             new_task = self.bot.loop.run_in_executor(None, task)
             search = await asyncio.wait_for(new_task, timeout=self.trigger_timeout + 5)
+            stats.add_search(time.perf_counter() - start)
         except TimeoutError:
             error_msg = (
                 "ReTrigger: regex process took too long. Removing from memory "
@@ -692,6 +738,85 @@ class TriggerHandler:
         else:
             return (True, search)
 
+    async def safe_regex_batch(
+        self,
+        guild: discord.Guild,
+        triggers: List[Trigger],
+        content: str,
+        bypass: Optional[bool] = None,
+    ) -> Tuple[Dict[str, List[str]], List[Trigger]]:
+        """
+            Search one message against many triggers with a single process pool task
+
+            Returns a mapping of trigger name to the search results and a list of
+            triggers that took too long and should be removed from memory.
+            Searching stops at the first match, triggers missing from both were
+            not searched and should fall back to `safe_regex_search`. If the batch
+            hangs every trigger in it is returned with no results so none of them
+            are sent to the pool again for this message.
+        """
+        if not triggers:
+            return {}, []
+        if bypass is None:
+            bypass = await self.config.guild(guild).bypass()
+        if bypass:
+            log.debug(f"Bypassing safe regex in guild {guild.name} ({guild.id})")
+            results = {}
+            for trigger in triggers:
+                start = time.perf_counter()
+                results[trigger.name] = trigger.regex.findall(content)
+                self.stats.get(guild.id, trigger.name).add_search(time.perf_counter() - start)
+                if results[trigger.name]:
+                    break
+            return results, []
+        loop = self.bot.loop
+        future = loop.create_future()
+
+        def _resolve(result):
+            if not future.done():
+                future.set_result(result)
+
+        def _error(error):
+            if not future.done():
+                future.set_exception(error)
+
+        # The pool calls these from its result handler thread
+        # so no executor thread has to sit waiting on the result
+        patterns = [(t.name, t.regex.pattern) for t in triggers]
+        self.re_pool.apply_async(
+            batch_findall,
+            (content, patterns, self.trigger_timeout),
+            callback=lambda r: loop.call_soon_threadsafe(_resolve, r),
+            error_callback=lambda e: loop.call_soon_threadsafe(_error, e),
+        )
+        try:
+            results, timed_out, timings = await asyncio.wait_for(
+                future, timeout=self.trigger_timeout
+            )
+        except asyncio.TimeoutError:
+            # One of these is hanging a worker, searching them again individually
+            # would only tie up another worker with the same pattern
+            log.warning(
+                f"ReTrigger: regex batch timed out in {guild.name} ({guild.id}) "
+                "skipping these triggers for this message: "
+                + ", ".join(t.name for t in triggers)
+            )
+            return {t.name: [] for t in triggers}, []
+        except Exception:
+            log.error(f"ReTrigger encountered an error in {guild.name} {guild.id}", exc_info=True)
+            return {}, []
+        for name, elapsed in timings.items():
+            self.stats.get(guild.id, name).add_search(elapsed)
+        evicted = [t for t in triggers if t.name in timed_out]
+        for trigger in evicted:
+            error_msg = (
+                "ReTrigger: regex process took too long. Removing from memory "
+                f"{guild.name} ({guild.id}) Author {trigger.author} "
+                f"Offending regex `{trigger.regex.pattern}` Name: {trigger.name}"
+            )
+            log.warning(error_msg)
+        return results, evicted
+
     async def perform_trigger(self, message: discord.Message, trigger: Trigger, find: List[str]):
 
         guild: discord.Guild = cast(discord.Guild, message.guild)
@@ -705,15 +830,11 @@ class TriggerHandler:
         ).format(guild=guild.name, trigger=trigger.name)
         if "resize" in trigger.response_type and own_permissions.attach_files and ALLOW_RESIZE:
             await channel.trigger_typing()
-            path = str(cog_data_path(self)) + f"/{guild.id}/{trigger.image}"
-            task = functools.partial(self.resize_image, size=len(find[0]) - 3, image=path)
-            new_task = self.bot.loop.run_in_executor(None, task)
             try:
-                file: discord.File = await asyncio.wait_for(new_task, timeout=60)
+                resized = await self.get_resized_image(guild, trigger.image, len(find[0]) - 3)
+                await channel.send(file=discord.File(BytesIO(resized), filename="resize.png"))
             except asyncio.TimeoutError:
-                pass
-            try:
-                await channel.send(file=file)
+                log.debug(error_in, exc_info=True)
             except discord.errors.Forbidden:
                 log.debug(error_in, exc_info=True)
             except Exception:
@@ -752,8 +873,8 @@ class TriggerHandler:
 
         if "image" in trigger.response_type and own_permissions.attach_files:
             await channel.trigger_typing()
-            path = str(cog_data_path(self)) + f"/{guild.id}/{trigger.image}"
-            file = discord.File(path)
+            image_data = await self.get_image(guild, trigger.image)
+            file = discord.File(BytesIO(image_data), filename=trigger.image)
             image_text_response = trigger.text
             if image_text_response:
                 image_text_response = await self.convert_parms(
@@ -771,8 +892,8 @@ class TriggerHandler:
         if "randimage" in trigger.response_type and own_permissions.attach_files:
             await channel.trigger_typing()
             image = random.choice(trigger.image)
-            path = str(cog_data_path(self)) + f"/{guild.id}/{image}"
-            file = discord.File(path)
+            image_data = await self.get_image(guild, image)
+            file = discord.File(BytesIO(image_data), filename=image)
             rimage_text_response = trigger.text
             if rimage_text_response:
                 rimage_text_response = await self.convert_parms(
@@ -1087,6 +1208,7 @@ class TriggerHandler:
                         image = trigger_list[triggers]["image"]
                         if isinstance(image, list):
                             for i in image:
+                                self.image_cache.discard_image(guild.id, i)
                                 path = str(cog_data_path(self)) + f"/{guild.id}/{i}"
                                 try:
                                     os.remove(path)
@@ -1096,6 +1218,7 @@ class TriggerHandler:
                                     )
                                     log.error(msg, exc_info=True)
                         else:
+                            self.image_cache.discard_image(guild.id, image)
                             path = str(cog_data_path(self)) + f"/{guild.id}/{image}"
                             try:
                                 os.remove(path)
@@ -0,0 +1,94 @@
+import asyncio
+import logging
+import discord
+
+from collections import OrderedDict
+from typing import Dict, Optional
+
+log = logging.getLogger("red.trusty-cogs.Starboard")
+
+
+class StarboardEditQueue:
+    """
+        Coalesces edits to starboard messages
+
+        Each starboard channel gets a worker that waits `delay` seconds after
+        the first change then writes only the latest content for every
+        message changed in that time. Deleting a message replaces any edit
+        waiting for it. Each channel holds at most `max_pending` messages,
+        past that the oldest waiting edit is dropped.
+    """
+
+    def __init__(self, bot, delay: float = 2.0, max_pending: int = 100):
+        self.bot = bot
+        self.delay = delay
+        self.max_pending = max_pending
+        # channel_id -> message_id -> new content or None to delete
+        self._pending: Dict[int, "OrderedDict[int, Optional[str]]"] = {}
+        self._workers: Dict[int, asyncio.Task] = {}
+        self.edits = 0
+        self.deletes = 0
+        self.suppressed = 0
+        self.dropped = 0
+
+    @property
+    def pending(self) -> int:
+        return sum(len(p) for p in self._pending.values())
+
+    def edit(self, channel_id: int, message_id: int, content: str) -> None:
+        self._queue(channel_id, message_id, content)
+
+    def delete(self, channel_id: int, message_id: int) -> None:
+        self._queue(channel_id, message_id, None)
+
+    def _queue(self, channel_id: int, message_id: int, content: Optional[str]) -> None:
+        pending = self._pending.setdefault(channel_id, OrderedDict())
+        if message_id in pending:
+            if pending[message_id] is None:
+                # Already being deleted
+                return
+            self.suppressed += 1
+        elif len(pending) >= self.max_pending:
+            for old_id, old_content in pending.items():
+                if old_content is not None:
+                    del pending[old_id]
+                    self.dropped += 1
+                    break
+        pending[message_id] = content
+        worker = self._workers.get(channel_id)
+        if worker is None or worker.done():
+            self._workers[channel_id] = self.bot.loop.create_task(self._worker(channel_id))
+
+    async def _worker(self, channel_id: int) -> None:
+        await asyncio.sleep(self.delay)
+        pending = self._pending.get(channel_id)
+        while pending:
+            message_id, content = pending.popitem(last=False)
+            await self._apply(channel_id, message_id, content)
+        self._pending.pop(channel_id, None)
+        self._workers.pop(channel_id, None)
+
+    async def _apply(self, channel_id: int, message_id: int, content: Optional[str]) -> None:
+        try:
+            if content is None:
+                await self.bot.http.delete_message(channel_id, message_id)
+                self.deletes += 1
+            else:
+                await self.bot.http.edit_message(channel_id, message_id, content=content)
+                self.edits += 1
+        except (discord.errors.NotFound, discord.errors.Forbidden):
+            # starboard message may have been deleted
+            pass
+        except Exception:
+            log.error("Error updating starboard message", exc_info=True)
+
+    async def flush(self) -> None:
+        """Write everything waiting straight away"""
+        for worker in self._workers.values():
+            worker.cancel()
+        self._workers = {}
+        for channel_id, pending in list(self._pending.items()):
+            while pending:
+                message_id, content = pending.popitem(last=False)
+                await self._apply(channel_id, message_id, content)
+        self._pending = {}
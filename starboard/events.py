@@ -9,6 +9,8 @@ from redbot.core.i18n import Translator, cog_i18n
 
 from .message_entry import StarboardMessage
 from .starboard_entry import StarboardEntry
+from .star_counter import StarCounter
+from .edit_queue import StarboardEditQueue
 
 _ = Translator("Starboard", __file__)
 log = logging.getLogger("red.trusty-cogs.Starboard")
@@ -26,11 +28,15 @@ class StarboardEvents:
     bot: Red
     config: Config
     starboards: Dict[int, StarboardEntry]
+    star_counter: StarCounter
+    edit_queue: StarboardEditQueue
 
     def __init__(self, bot):
         self.bot: Red
         self.config: Config
         self.starboards: Dict[int, StarboardEntry]
+        self.star_counter: StarCounter
+        self.edit_queue: StarboardEditQueue
 
     async def _build_starboard_info(self, ctx: commands.Context, starboard: StarboardEntry):
         channel_perms = ctx.channel.permissions_for(ctx.guild.me)
@@ -149,6 +155,38 @@ class StarboardEvents:
             {n: s.to_json() for n, s in self.starboards[guild.id].items()}
         )
 
+    async def _save_message(
+        self, guild: discord.Guild, starboard: StarboardEntry, message: StarboardMessage
+    ) -> None:
+        await self.config.guild(guild).set_raw(
+            "messages", starboard.name, str(message.original_message), value=message.to_json()
+        )
+
+    async def _remove_message(
+        self, guild: discord.Guild, starboard: StarboardEntry, message: StarboardMessage
+    ) -> None:
+        await self.config.guild(guild).clear_raw(
+            "messages", starboard.name, str(message.original_message)
+        )
+
+    async def _count_stars(
+        self, messages: List[discord.Message], starboard: StarboardEntry
+    ) -> Dict[int, int]:
+        """
+            Find everyone who has starred a message and its starboard copy
+            along with how many of the two they starred
+        """
+        reactions = [
+            r for m in messages for r in m.reactions if str(r.emoji) == str(starboard.emoji)
+        ]
+        unique_users: Dict[int, int] = {}
+        for reaction in reactions:
+            async for user in reaction.users():
+                if user.id not in unique_users and not await self._check_roles(starboard, user):
+                    continue
+                unique_users[user.id] = unique_users.get(user.id, 0) + 1
+        return unique_users
+
     async def _get_count(self, message_entry: StarboardMessage, starboard: StarboardEntry) -> int:
         orig_channel = self.bot.get_channel(message_entry.original_channel)
         new_channel = self.bot.get_channel(message_entry.new_channel)
@@ -156,24 +194,19 @@ class StarboardEvents:
             orig_msg = await orig_channel.get_message(message_entry.original_message)
         except AttributeError:
             orig_msg = await orig_channel.fetch_message(message_entry.original_message)
-        orig_reaction = [r for r in orig_msg.reactions if str(r.emoji) == str(starboard.emoji)]
+        messages = [orig_msg]
         try:
             try:
                 new_msg = await new_channel.get_message(message_entry.new_message)
             except AttributeError:
                 new_msg = await new_channel.fetch_message(message_entry.new_message)
-            new_reaction = [r for r in new_msg.reactions if str(r.emoji) == str(starboard.emoji)]
-            reactions = orig_reaction + new_reaction
+            messages.append(new_msg)
         except discord.errors.NotFound:
-            reactions = orig_reaction
-        unique_users: List[int] = []
-        for reaction in reactions:
-            async for user in reaction.users():
-                if not await self._check_roles(starboard, user):
-                    continue
-                if user.id not in unique_users:
-                    unique_users.append(user.id)
-        return len(unique_users)
+            pass
+        users = await self._count_stars(messages, starboard)
+        key = (orig_channel.guild.id, starboard.name, message_entry.original_message)
+        self.star_counter.set(key, message_entry.author, users)
+        return len(users)
 
     async def is_mod_or_admin(self, member: discord.Member) -> bool:
         guild = member.guild
@@ -189,11 +222,11 @@ class StarboardEvents:
 
     @listener()
     async def on_raw_reaction_add(self, payload: discord.RawReactionActionEvent) -> None:
-        await self._update_stars(payload)
+        await self._update_stars(payload, True)
 
     @listener()
     async def on_raw_reaction_remove(self, payload: discord.RawReactionActionEvent) -> None:
-        await self._update_stars(payload)
+        await self._update_stars(payload, False)
 
     @listener()
     async def on_raw_reaction_clear(self, payload: discord.RawReactionActionEvent) -> None:
@@ -203,19 +236,21 @@ class StarboardEvents:
         except AttributeError:
             # DMChannels don't have guilds
             return
-        try:
-            msg = await channel.fetch_message(id=payload.message_id)
-        except AttributeError:
-            msg = await channel.get_message(id=payload.message_id)
-        except (discord.errors.NotFound, discord.Forbidden):
+        if guild.id not in self.starboards:
             return
-        # starboards = await self.config.guild(guild).starboards()
         for name, starboard in self.starboards[guild.id].items():
-            # starboard = StarboardEntry.from_json(s_board)
-            star_channel = self.bot.get_channel(starboard.channel)
-            await self._loop_messages(payload, starboard, star_channel, msg)
+            messages = starboard.messages.get(payload.message_id)
+            if messages is None:
+                self.star_counter.discard((guild.id, name, payload.message_id))
+                continue
+            self.star_counter.discard((guild.id, name, messages.original_message))
+            try:
+                count = await self._get_count(messages, starboard)
+            except (discord.errors.NotFound, discord.errors.Forbidden):
+                continue
+            await self._update_starboard_message(guild, starboard, messages, count)
 
-    async def _update_stars(self, payload: discord.RawReactionActionEvent) -> None:
+    async def _update_stars(self, payload: discord.RawReactionActionEvent, added: bool) -> None:
         channel = self.bot.get_channel(id=payload.channel_id)
         try:
             guild = channel.guild
@@ -224,14 +259,8 @@ class StarboardEvents:
             return
         if guild.id not in self.starboards:
             return
-        try:
-            msg = await channel.fetch_message(id=payload.message_id)
-        except AttributeError:
-            msg = await channel.get_message(id=payload.message_id)
-        except (discord.errors.NotFound, discord.Forbidden):
-            return
         member = guild.get_member(payload.user_id)
-        if member and member.bot:
+        if member is None:
             return
         starboard = None
         for name, s_board in self.starboards[guild.id].items():
@@ -246,78 +275,74 @@ class StarboardEvents:
         if not await self._check_channel(starboard, channel):
             return
 
-        if starboard.emoji == str(payload.emoji):
-            star_channel = self.bot.get_channel(starboard.channel)
-            if member.id == msg.author.id and not starboard.selfstar:
-                # allow mods, admins and owner to automatically star messages
-                return
-            if await self._loop_messages(payload, starboard, star_channel, msg):
-                return
+        messages = starboard.messages.get(payload.message_id)
+        original_message = messages.original_message if messages else payload.message_id
+        key = (guild.id, starboard.name, original_message)
+        stars = self.star_counter.get(key)
+        msg = None
+        changed = True
+        if stars is None:
+            # Count everything once, this already includes this reaction
             try:
-                reaction = [r for r in msg.reactions if str(r.emoji) == str(payload.emoji)][0]
-                count = reaction.count
-            except IndexError:
-                count = 0
-
-            star_message = StarboardMessage(msg.id, channel.id, None, None, msg.author.id)
-            if count < starboard.threshold:
-                if star_message.to_json() not in starboard.messages:
-                    self.starboards[guild.id][starboard.name].messages.append(
-                        star_message.to_json()
-                    )
-                await self._save_starboards(guild)
+                if messages is not None:
+                    await self._get_count(messages, starboard)
+                else:
+                    try:
+                        msg = await channel.fetch_message(id=payload.message_id)
+                    except AttributeError:
+                        msg = await channel.get_message(id=payload.message_id)
+                    users = await self._count_stars([msg], starboard)
+                    self.star_counter.set(key, msg.author.id, users)
+            except (discord.errors.NotFound, discord.errors.Forbidden):
                 return
+            stars = self.star_counter.get(key)
+        else:
+            changed = stars.update(member.id, added)
+        if member.bot or (member.id == stars.author and not starboard.selfstar):
+            # These still count but can't update the starboard themselves
+            return
+        count = len(stars.users)
 
-            em = await self._build_embed(guild, msg, starboard)
-            count_msg = "{} **#{}**".format(payload.emoji, count)
-            post_msg = await star_channel.send(count_msg, embed=em)
-            if star_message.to_json() not in starboard.messages:
-                self.starboards[guild.id][starboard.name].messages.append(star_message.to_json())
-            star_message = StarboardMessage(
-                msg.id, channel.id, post_msg.id, star_channel.id, msg.author.id
-            )
-            self.starboards[guild.id][starboard.name].messages.append(star_message.to_json())
-            await self._save_starboards(guild)
-
-    async def _loop_messages(
-        self,
-        payload: discord.RawReactionActionEvent,
-        starboard: StarboardEntry,
-        star_channel: discord.TextChannel,
-        message: discord.Message,
-    ):
-        guild = star_channel.guild
-        for messages in (StarboardMessage.from_json(m) for m in starboard.messages):
-            same_message = messages.original_message == message.id
-            same_channel = messages.original_channel == payload.channel_id
-            starboard_message = messages.new_message == message.id
-            starboard_channel = messages.new_channel == payload.channel_id
+        if messages is not None:
+            if changed:
+                await self._update_starboard_message(guild, starboard, messages, count)
+            return
+        if count < starboard.threshold:
+            return
 
-            if not messages.new_message or not messages.new_channel:
-                continue
-            if (same_message and same_channel) or (starboard_message and starboard_channel):
-                count = await self._get_count(messages, starboard)
+        if msg is None:
+            try:
                 try:
-                    message_edit = await star_channel.fetch_message(messages.new_message)
+                    msg = await channel.fetch_message(id=payload.message_id)
                 except AttributeError:
-                    message_edit = await star_channel.get_message(messages.new_message)  # type: ignore
-                    # This is for backwards compatibility for older Red
-                except (discord.errors.NotFound, discord.errors.Forbidden):
-                    # starboard message may have been deleted
-                    return True
-                if count < starboard.threshold:
-                    star_message = StarboardMessage(
-                        message.id, payload.channel_id, None, None, message.author.id
-                    )
-                    if messages.to_json() in starboard.messages:
-                        starboard.messages.remove(messages.to_json())
-                    starboard.messages.append(star_message.to_json())
-
-                    await self._save_starboards(guild)
+                    msg = await channel.get_message(id=payload.message_id)
+            except (discord.errors.NotFound, discord.errors.Forbidden):
+                return
+        star_channel = self.bot.get_channel(starboard.channel)
+        em = await self._build_embed(guild, msg, starboard)
+        count_msg = "{} **#{}**".format(payload.emoji, count)
+        post_msg = await star_channel.send(count_msg, embed=em)
+        star_message = StarboardMessage(
+            msg.id, channel.id, post_msg.id, star_channel.id, msg.author.id
+        )
+        starboard.messages.add(star_message)
+        await self._save_message(guild, starboard, star_message)
 
-                    await message_edit.delete()
-                    return True
-                count_message = f"{starboard.emoji} **#{count}**"
-                await message_edit.edit(content=count_message)
-                return True
-        return False
+    async def _update_starboard_message(
+        self,
+        guild: discord.Guild,
+        starboard: StarboardEntry,
+        messages: StarboardMessage,
+        count: int,
+    ) -> None:
+        """
+            Update the count on a starboard message or remove it when
+            it drops below the threshold
+        """
+        if count < starboard.threshold:
+            starboard.messages.remove(messages.original_message)
+            await self._remove_message(guild, starboard, messages)
+            self.edit_queue.delete(messages.new_channel, messages.new_message)
+            return
+        count_message = f"{starboard.emoji} **#{count}**"
+        self.edit_queue.edit(messages.new_channel, messages.new_message, count_message)
@@ -1,4 +1,9 @@
+from typing import Dict, Iterator, List, Optional, Union
+
+
 class StarboardMessage:
+    __slots__ = ("original_message", "original_channel", "new_message", "new_channel", "author")
+
     def __init__(
         self,
         original_message: int,
@@ -31,3 +36,55 @@ class StarboardMessage:
             data["new_channel"],
             data["author"],
         )
+
+
+class StarboardMessages:
+    """
+        The messages posted to a starboard
+
+        Indexed by both the original message ID and the starboard
+        message ID so either can be looked up directly.
+    """
+
+    def __init__(self, messages: List[StarboardMessage] = []):
+        self._by_original: Dict[int, StarboardMessage] = {}
+        self._by_new: Dict[int, StarboardMessage] = {}
+        for message in messages:
+            self.add(message)
+
+    def __len__(self) -> int:
+        return len(self._by_original)
+
+    def __iter__(self) -> Iterator[StarboardMessage]:
+        return iter(list(self._by_original.values()))
+
+    def add(self, message: StarboardMessage) -> None:
+        self.remove(message.original_message)
+        self._by_original[message.original_message] = message
+        if message.new_message:
+            self._by_new[message.new_message] = message
+
+    def remove(self, original_message: int) -> Optional[StarboardMessage]:
+        message = self._by_original.pop(original_message, None)
+        if message is not None and message.new_message:
+            self._by_new.pop(message.new_message, None)
+        return message
+
+    def get(self, message_id: int) -> Optional[StarboardMessage]:
+        """Find a message by either its original or starboard message ID"""
+        return self._by_original.get(message_id) or self._by_new.get(message_id)
+
+    def to_json(self) -> Dict[str, dict]:
+        return {str(m.original_message): m.to_json() for m in self._by_original.values()}
+
+    @classmethod
+    def from_json(cls, data: Union[list, dict]):
+        """
+            Accepts both the saved mapping and the old list of messages
+
+            Messages that were never posted to the starboard are dropped
+        """
+        if isinstance(data, dict):
+            data = list(data.values())
+        messages = [StarboardMessage.from_json(m) for m in data]
+        return cls([m for m in messages if m.new_message and m.new_channel])
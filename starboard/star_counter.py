@@ -0,0 +1,68 @@
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+StarKey = Tuple[int, str, int]
+
+
+class StarCount:
+    """
+        The author of a message and who starred it
+
+        `users` maps each user to how many of the original message
+        and its starboard copy they have starred.
+    """
+
+    __slots__ = ("author", "users")
+
+    def __init__(self, author: int, users: Dict[int, int]):
+        self.author = author
+        self.users = users
+
+    def update(self, user_id: int, added: bool) -> bool:
+        """Add or remove a users star, returns True if the count changed"""
+        stars = self.users.get(user_id, 0)
+        if added:
+            self.users[user_id] = stars + 1
+            return stars == 0
+        if stars <= 1:
+            return self.users.pop(user_id, None) is not None
+        self.users[user_id] = stars - 1
+        return False
+
+
+class StarCounter:
+    """
+        Who has starred each message
+
+        Entries are keyed by `(guild_id, starboard_name, original_message_id)`
+        and kept up to date from reaction events. Anything missing has to be
+        counted from the message reactions once, after that no API calls are
+        needed. The least recently starred messages are forgotten once
+        `max_messages` is reached.
+    """
+
+    def __init__(self, max_messages: int = 5000):
+        self.max_messages = max_messages
+        self._counts: "OrderedDict[StarKey, StarCount]" = OrderedDict()
+
+    def get(self, key: StarKey) -> Optional[StarCount]:
+        count = self._counts.get(key)
+        if count is not None:
+            self._counts.move_to_end(key)
+        return count
+
+    def set(self, key: StarKey, author: int, users: Dict[int, int]) -> StarCount:
+        count = StarCount(author, users)
+        self._counts[key] = count
+        self._counts.move_to_end(key)
+        while len(self._counts) > self.max_messages:
+            self._counts.popitem(last=False)
+        return count
+
+    def discard(self, key: StarKey) -> None:
+        self._counts.pop(key, None)
+
+    def discard_starboard(self, guild_id: int, name: str) -> None:
+        """Forget every count for a starboard after its settings change"""
+        for key in [k for k in self._counts if k[0] == guild_id and k[1] == name]:
+            del self._counts[key]
@@ -9,8 +9,10 @@ from redbot.core.utils.menus import menu, DEFAULT_CONTROLS
 
 from .converters import StarboardExists
 from .events import StarboardEvents
-from .message_entry import StarboardMessage
+from .message_entry import StarboardMessage, StarboardMessages
 from .starboard_entry import StarboardEntry
+from .star_counter import StarCounter
+from .edit_queue import StarboardEditQueue
 
 _ = Translator("Starboard", __file__)
 log = logging.getLogger("red.trusty-cogs.Starboard")
@@ -22,24 +24,44 @@ class Starboard(StarboardEvents, commands.Cog):
         Create a starboard to *pin* those special comments indefinitely
     """
 
-    __version__ = "2.2.0"
+    __version__ = "2.3.2"
     __author__ = "TrustyJAID"
 
     def __init__(self, bot):
         self.bot = bot
-        default_guild = {"starboards": {}}
+        default_guild = {"starboards": {}, "messages": {}}
 
         self.config = Config.get_conf(self, 356488795)
         self.config.register_guild(**default_guild)
         self.starboards = {}
+        self.star_counter = StarCounter()
+        self.edit_queue = StarboardEditQueue(bot)
 
     async def initialize(self) -> None:
         for guild_id in await self.config.all_guilds():
             self.starboards[guild_id] = {}
-            all_data = await self.config.guild(discord.Object(id=guild_id)).starboards()
+            guild_obj = discord.Object(id=guild_id)
+            all_data = await self.config.guild(guild_obj).starboards()
+            all_messages = await self.config.guild(guild_obj).messages()
+            migrated = False
             for name, data in all_data.items():
                 starboard = StarboardEntry.from_json(data)
+                if len(starboard.messages):
+                    # Move messages saved in the starboard settings to their own place
+                    migrated = True
+                    await self.config.guild(guild_obj).set_raw(
+                        "messages", name, value=starboard.messages.to_json()
+                    )
+                elif name in all_messages:
+                    starboard.messages = StarboardMessages.from_json(all_messages[name])
                 self.starboards[guild_id][name] = starboard
+            if migrated:
+                await self._save_starboards(guild_obj)
+
+    def cog_unload(self):
+        self.bot.loop.create_task(self.edit_queue.flush())
+
+    __unload = cog_unload
 
     def format_help_for_context(self, ctx: commands.Context) -> str:
         """
@@ -75,6 +97,28 @@ class Starboard(StarboardEvents, commands.Cog):
             else:
                 await menu(ctx, texts, DEFAULT_CONTROLS)
 
+    @starboard.command(name="editstats")
+    @checks.is_owner()
+    async def edit_stats(self, ctx: commands.Context) -> None:
+        """
+            Show how many starboard message edits have been made or skipped
+        """
+        queue = self.edit_queue
+        msg = _(
+            "Edits made: {edits}\n"
+            "Deletes made: {deletes}\n"
+            "Edits suppressed by newer counts: {suppressed}\n"
+            "Edits dropped from full queues: {dropped}\n"
+            "Currently waiting: {pending}"
+        ).format(
+            edits=queue.edits,
+            deletes=queue.deletes,
+            suppressed=queue.suppressed,
+            dropped=queue.dropped,
+            pending=queue.pending,
+        )
+        await ctx.send(msg)
+
     @starboard.command(name="create", aliases=["add"])
     async def setup_starboard(
         self,
@@ -134,10 +178,11 @@ class Starboard(StarboardEvents, commands.Cog):
         roles = 0
         channels = 0
         boards = 0
-        for name, starboard in self.starboards[guild.id].items():
+        for name, starboard in list(self.starboards[guild.id].items()):
             channel = guild.get_channel(starboard.channel)
             if channel is None:
                 del self.starboards[guild.id][name]
+                await self.config.guild(guild).clear_raw("messages", name)
                 boards += 1
                 continue
             if starboard.blacklist_channel:
@@ -180,6 +225,8 @@ class Starboard(StarboardEvents, commands.Cog):
         """
         del self.starboards[ctx.guild.id][starboard.name]
         await self._save_starboards(ctx.guild)
+        await self.config.guild(ctx.guild).clear_raw("messages", starboard.name)
+        self.star_counter.discard_starboard(ctx.guild.id, starboard.name)
         await ctx.send(_("Deleted starboard {name}").format(name=starboard.name))
 
     @commands.command()
@@ -216,39 +263,36 @@ class Starboard(StarboardEvents, commands.Cog):
             error_msg = _("Starboard {name} isn't enabled.").format(name=starboard.name)
             await ctx.send(error_msg)
             return
-        if not await self.check_roles(starboard, ctx.message.author):
+        if not await self._check_roles(starboard, ctx.message.author):
             error_msg = _(
                 "One of your roles is blacklisted or you don't have the whitelisted role."
             )
             await ctx.send(error_msg)
             return
-        if not await self.check_channel(starboard, channel):
+        if not await self._check_channel(starboard, channel):
             error_msg = _("This channel is either blacklisted or not in the whitelisted channels.")
             await ctx.send(error_msg)
             return
         count = 1
         star_channel = self.bot.get_channel(starboard.channel)
-        for messages in [StarboardMessage.from_json(m) for m in starboard.messages]:
-            same_msg = messages.original_message == msg.id
-            same_channel = messages.original_channel == channel.id
-            if same_msg and same_channel and messages.new_message:
-                try:
-                    msg_edit = await star_channel.get_message(messages.new_message)
-                except AttributeError:
-                    msg_edit = await star_channel.fetch_message(messages.new_message)
-                count_msg = f"{starboard.emoji} **#{count}**"
-                await msg_edit.edit(content=count_msg)
-                return
+        messages = starboard.messages.get(msg.id)
+        if messages is not None and messages.original_channel == channel.id:
+            try:
+                msg_edit = await star_channel.get_message(messages.new_message)
+            except AttributeError:
+                msg_edit = await star_channel.fetch_message(messages.new_message)
+            count_msg = f"{starboard.emoji} **#{count}**"
+            await msg_edit.edit(content=count_msg)
+            return
 
-        em = await self.build_embed(guild, msg, starboard)
+        em = await self._build_embed(guild, msg, starboard)
         count_msg = f"{starboard.emoji} **#{count}**"
         post_msg = await star_channel.send(count_msg, embed=em)
         star_message = StarboardMessage(
             msg.id, channel.id, post_msg.id, star_channel.id, msg.author.id
         )
-        if star_message not in self.starboard[ctx.guild.id][starboard.name].messages:
-            self.starboard[ctx.guild.id][starboard.name].messages.append(star_message.to_json())
-        await self._save_starboards(guild)
+        starboard.messages.add(star_message)
+        await self._save_message(guild, starboard, star_message)
 
     @starboard.group()
     async def whitelist(self, ctx: commands.Context) -> None:
@@ -301,6 +345,7 @@ class Starboard(StarboardEvents, commands.Cog):
                 self.starboards[ctx.guild.id][starboard.name].blacklist_role.append(
                     channel_or_role.id
                 )
+                self.star_counter.discard_starboard(ctx.guild.id, starboard.name)
                 await self._save_starboards(guild)
                 msg = _("{channel_or_role} blacklisted on starboard {name}").format(
                     channel_or_role=channel_or_role.name, name=starboard.name
@@ -348,6 +393,7 @@ class Starboard(StarboardEvents, commands.Cog):
                 self.starboards[ctx.guild.id][starboard.name].blacklist_role.remove(
                     channel_or_role.id
                 )
+                self.star_counter.discard_starboard(ctx.guild.id, starboard.name)
                 await self._save_starboards(guild)
                 msg = _("{channel_or_role} removed from blacklist on starboard {name}").format(
                     channel_or_role=channel_or_role.name, name=starboard.name
@@ -395,6 +441,7 @@ class Starboard(StarboardEvents, commands.Cog):
                 self.starboards[ctx.guild.id][starboard.name].whitelist_role.append(
                     channel_or_role.id
                 )
+                self.star_counter.discard_starboard(ctx.guild.id, starboard.name)
                 await self._save_starboards(guild)
                 msg = _("{channel_or_role} whitelisted on starboard {name}").format(
                     channel_or_role=channel_or_role.name, name=starboard.name
@@ -442,6 +489,7 @@ class Starboard(StarboardEvents, commands.Cog):
                 self.starboards[ctx.guild.id][starboard.name].whitelist_role.remove(
                     channel_or_role.id
                 )
+                self.star_counter.discard_starboard(ctx.guild.id, starboard.name)
                 await self._save_starboards(guild)
                 msg = _("{channel_or_role} removed from whitelist on starboard {name}").format(
                     channel_or_role=channel_or_role.name, name=starboard.name
@@ -510,6 +558,7 @@ class Starboard(StarboardEvents, commands.Cog):
         else:
             msg = _("Selfstarring on starboard {name} enabled.").format(name=starboard.name)
         self.starboards[ctx.guild.id][starboard.name].selfstar = not starboard.selfstar
+        self.star_counter.discard_starboard(ctx.guild.id, starboard.name)
         await self._save_starboards(guild)
         await ctx.send(msg)
 
@@ -557,6 +606,7 @@ class Starboard(StarboardEvents, commands.Cog):
                 await ctx.send(_("That emoji is not on this guild!"))
                 return
         self.starboards[ctx.guild.id][starboard.name].emoji = str(emoji)
+        self.star_counter.discard_starboard(ctx.guild.id, starboard.name)
         await self._save_starboards(guild)
         msg = _("{emoji} set for starboard {name}").format(emoji=emoji, name=starboard.name)
         await ctx.send(msg)
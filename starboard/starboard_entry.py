@@ -1,3 +1,6 @@
+from .message_entry import StarboardMessages
+
+
 class StarboardEntry:
     def __init__(
         self,
@@ -9,7 +12,7 @@ class StarboardEntry:
         selfstar: bool = False,
         blacklist_role: list = [],
         whitelist_role: list = [],
-        messages: list = [],
+        messages: StarboardMessages = None,
         blacklist_channel: list = [],
         whitelist_channel: list = [],
         threshold: int = 1,
@@ -24,7 +27,7 @@ class StarboardEntry:
         self.selfstar = selfstar
         self.blacklist_role = blacklist_role
         self.whitelist_role = whitelist_role
-        self.messages = messages
+        self.messages = messages if messages is not None else StarboardMessages()
         self.blacklist_channel = blacklist_channel
         self.whitelist_channel = whitelist_channel
         self.threshold = threshold
@@ -39,7 +42,6 @@ class StarboardEntry:
             "selfstar": self.selfstar,
             "blacklist_role": self.blacklist_role,
             "whitelist_role": self.whitelist_role,
-            "messages": self.messages,
             "blacklist_channel": self.blacklist_channel,
             "whitelist_channel": self.whitelist_channel,
             "threshold": self.threshold,
@@ -62,7 +64,8 @@ class StarboardEntry:
             selfstar,
             data["blacklist_role"],
             data["whitelist_role"],
-            data["messages"],
+            # messages are saved separately, this moves them from older data
+            StarboardMessages.from_json(data.get("messages", [])),
             data["blacklist_channel"],
             data["whitelist_channel"],
             data["threshold"],
@@ -0,0 +1,138 @@
+import asyncio
+import logging
+
+from collections import OrderedDict, deque
+from typing import Any, Awaitable, Callable, Deque, List, Set
+
+log = logging.getLogger("red.trusty-cogs.Tweets")
+
+Handler = Callable[[List[Any]], Awaitable[None]]
+Predicate = Callable[[Any], bool]
+
+
+class TweetQueue:
+    """
+        Hands tweets from the stream thread to the bot's loop
+
+        `put_threadsafe` is called on tweepy's thread and only schedules the
+        tweet onto the loop. Tweets that `accepts` turns down are ignored
+        before they take up any space. The rest wait in a queue per account
+        and a pool of `workers` posts them, each account in order and one
+        batch of up to
+        `batch_size` tweets at a time so a busy account takes turns with the
+        rest. An account holds at most `max_per_account` tweets and the whole
+        queue at most `max_size`, past that the oldest tweets are dropped.
+    """
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        handler: Handler,
+        accepts: Predicate,
+        workers: int = 3,
+        batch_size: int = 5,
+        max_per_account: int = 20,
+        max_size: int = 200,
+    ):
+        self.loop = loop
+        self.handler = handler
+        self.accepts = accepts
+        self.batch_size = batch_size
+        self.max_per_account = max_per_account
+        self.max_size = max_size
+        self._pending: "OrderedDict[int, Deque[Any]]" = OrderedDict()
+        self._active: Set[int] = set()
+        self._size = 0
+        self._ready = asyncio.Event()
+        self._workers = [loop.create_task(self._worker()) for i in range(workers)]
+        self.received = 0
+        self.ignored = 0
+        self.posted = 0
+        self.batches = 0
+        self.dropped = 0
+        self.overflow = 0
+        self.max_depth = 0
+
+    @property
+    def depth(self) -> int:
+        return self._size
+
+    def put_threadsafe(self, status: Any) -> bool:
+        """Queue a tweet from another thread, returns False once the loop is gone"""
+        try:
+            self.loop.call_soon_threadsafe(self.put, status)
+        except RuntimeError:
+            # The loop has been closed
+            return False
+        return True
+
+    def put(self, status: Any) -> None:
+        self.received += 1
+        if not self.accepts(status):
+            self.ignored += 1
+            return
+        user_id = status.user.id
+        pending = self._pending.get(user_id)
+        if pending is None:
+            pending = deque()
+            self._pending[user_id] = pending
+        if len(pending) >= self.max_per_account:
+            pending.popleft()
+            self._size -= 1
+            self.dropped += 1
+        elif self._size >= self.max_size:
+            self._drop_from_largest()
+        pending.append(status)
+        self._size += 1
+        self.max_depth = max(self.max_depth, self._size)
+        self._ready.set()
+
+    def _drop_from_largest(self) -> None:
+        largest = max(self._pending.values(), key=len)
+        if largest:
+            largest.popleft()
+            self._size -= 1
+            self.overflow += 1
+
+    def _next_batch(self) -> List[Any]:
+        for user_id, pending in self._pending.items():
+            if user_id in self._active or not pending:
+                continue
+            batch = [pending.popleft() for i in range(min(self.batch_size, len(pending)))]
+            self._size -= len(batch)
+            # Move to the back so other accounts get a turn first
+            self._pending.move_to_end(user_id)
+            self._active.add(user_id)
+            return batch
+        return []
+
+    async def _worker(self) -> None:
+        while True:
+            batch = self._next_batch()
+            if not batch:
+                self._ready.clear()
+                await self._ready.wait()
+                continue
+            user_id = batch[0].user.id
+            try:
+                await self.handler(batch)
+                self.posted += len(batch)
+                self.batches += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                log.error("Error posting tweets", exc_info=True)
+            finally:
+                self._active.discard(user_id)
+                if not self._pending.get(user_id, True):
+                    del self._pending[user_id]
+                if self._size:
+                    # Another worker may have skipped this account while it was active
+                    self._ready.set()
+
+    def close(self) -> None:
+        for worker in self._workers:
+            worker.cancel()
+        self._workers = []
+        self._pending = OrderedDict()
+        self._size = 0
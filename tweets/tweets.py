@@ -6,15 +6,21 @@ from redbot.core import Config, checks, commands
 from redbot.core.utils.chat_formatting import escape, pagify
 from redbot.core.i18n import Translator, cog_i18n
 from .tweet_entry import TweetEntry
+from .tweet_queue import TweetQueue
+from .webhook_cache import WebhookCache
+from collections import OrderedDict
 from html import unescape
 import tweepy as tw
-from typing import Tuple, Any, Optional
+from typing import Tuple, Any, Optional, List, Dict
 from datetime import datetime
 import functools
 
 _ = Translator("Tweets", __file__)
 
 log = logging.getLogger("red.trusty-cogs.Tweets")
+
+# How many channels in one guild a tweet is posted to at once
+GUILD_CONCURRENCY = 5
 listener = getattr(commands.Cog, "listener", None)  # red 3.0 backwards compatibility support
 
 if listener is None:  # thanks Sinbad
@@ -24,12 +30,17 @@ if listener is None:  # thanks Sinbad
 
 @cog_i18n(_)
 class TweetListener(tw.StreamListener):
-    def __init__(self, api, bot):
+    def __init__(self, api, bot, queue):
         super().__init__(api=api)
         self.bot = bot
+        self.queue = queue
 
     def on_status(self, status):
-        self.bot.dispatch("tweet_status", status)
+        # This runs on the stream thread, the queue moves it onto the bot's loop
+        if not self.queue.put_threadsafe(status):
+            return False
+        # Other cogs may still be listening for every tweet from the stream
+        self.bot.loop.call_soon_threadsafe(self.bot.dispatch, "tweet_status", status)
         if self.bot.is_closed():
             return False
         else:
@@ -76,6 +87,11 @@ class Tweets(commands.Cog):
         }
         self.config.register_global(**default_global)
         self.mystream = None
+        self.tweet_queue = TweetQueue(bot.loop, self.post_tweets, self.accepts_tweet)
+        self.webhooks = WebhookCache()
+        self.guild_limits: Dict[int, asyncio.Semaphore] = {}
+        self.replies: "OrderedDict[int, tw.Status]" = OrderedDict()
+        self.api = None
         self.twitter_loop = bot.loop.create_task(self.start_stream())
         self.accounts = {}
 
@@ -120,7 +136,7 @@ class Tweets(commands.Cog):
 
     async def _start_stream(self, tweet_list, api):
         try:
-            stream_start = TweetListener(api, self.bot)
+            stream_start = TweetListener(api, self.bot, self.tweet_queue)
             self.mystream = tw.Stream(
                 api.auth, stream_start, chunk_size=1024, timeout=900.0
             )
@@ -177,6 +193,34 @@ class Tweets(commands.Cog):
                 await channel.send(msg)
         return
 
+    @staticmethod
+    def get_media_url(status) -> Optional[str]:
+        """The first image in a tweet if it has one"""
+        img = None
+        if hasattr(status, "extended_entities"):
+            img = status.extended_entities["media"][0]["media_url_https"]
+        if hasattr(status, "extended_tweet") and "media" in status.extended_tweet["entities"]:
+            img = status.extended_tweet["entities"]["media"][0]["media_url_https"]
+        return img
+
+    async def get_reply(self, status_id: int) -> Optional[tw.Status]:
+        """Looks up the tweet being replied to, remembering recent ones"""
+        if status_id in self.replies:
+            self.replies.move_to_end(status_id)
+            return self.replies[status_id]
+        if self.api is None:
+            self.api = await self.authenticate()
+        task = functools.partial(self.api.statuses_lookup, id_=[status_id])
+        lookup = await self.bot.loop.run_in_executor(None, task)
+        if not lookup:
+            # Don't remember failures so the next tweet can try again
+            return None
+        reply = lookup[0]
+        self.replies[status_id] = reply
+        while len(self.replies) > 100:
+            self.replies.popitem(last=False)
+        return reply
+
     async def build_tweet_embed(self, status):
         username = status.user.screen_name
         post_url = "https://twitter.com/{}/status/{}".format(status.user.screen_name, status.id)
@@ -194,32 +238,20 @@ class Tweets(commands.Cog):
             )
             status = status.retweeted_status
             em.set_footer(text=f"@{username} RT @{status.user.screen_name}")
-            if hasattr(status, "extended_entities"):
-                em.set_image(url=status.extended_entities["media"][0]["media_url_https"])
-            if hasattr(status, "extended_tweet"):
-                text = status.extended_tweet["full_text"]
-                if "media" in status.extended_tweet["entities"]:
-                    img = status.extended_tweet["entities"]["media"][0]["media_url_https"]
-                    em.set_image(url=img)
-            else:
-                text = status.text
         else:
             em.set_author(
                 name=status.user.name, url=post_url, icon_url=status.user.profile_image_url
             )
-            if hasattr(status, "extended_entities"):
-                em.set_image(url=status.extended_entities["media"][0]["media_url_https"])
-            if hasattr(status, "extended_tweet"):
-                text = status.extended_tweet["full_text"]
-                if "media" in status.extended_tweet["entities"]:
-                    img = status.extended_tweet["entities"]["media"][0]["media_url_https"]
-                    em.set_image(url=img)
-            else:
-                text = status.text
+        img = self.get_media_url(status)
+        if img:
+            em.set_image(url=img)
+        if hasattr(status, "extended_tweet"):
+            text = status.extended_tweet["full_text"]
+        else:
+            text = status.text
         if status.in_reply_to_screen_name:
-            api = await self.authenticate()
-            try:
-                reply = api.statuses_lookup(id_=[status.in_reply_to_status_id])[0]
+            reply = await self.get_reply(status.in_reply_to_status_id)
+            if reply is not None:
                 # log.debug(reply)
                 in_reply_to = _("In reply to {name} (@{screen_name})").format(
                     name=reply.user.name,
@@ -228,30 +260,50 @@ class Tweets(commands.Cog):
                 reply_text = unescape(reply.text)
                 if hasattr(reply, "extended_tweet"):
                     reply_text = unescape(reply.extended_tweet["full_text"])
-                if hasattr(reply, "extended_entities") and not em.image:
-                    em.set_image(url=reply.extended_entities["media"][0]["media_url_https"])
+                reply_img = self.get_media_url(reply)
+                if reply_img and not img:
+                    em.set_image(url=reply_img)
                 em.add_field(
                     name=in_reply_to,
                     value=reply_text
                 )
-            except IndexError:
-                log.debug(_("Error grabbing in reply to tweet."), exc_info=True)
+            else:
+                log.debug(_("Error grabbing in reply to tweet."))
 
         em.description = escape(unescape(text), formatting=True)
 
         return em
 
-    @listener()
-    async def on_tweet_status(self, status):
-        """Posts the tweets to the channel"""
-        username = status.user.screen_name
-        user_id = status.user.id
+    def accepts_tweet(self, status) -> bool:
+        """Whether a tweet from the stream will be posted anywhere"""
+        account = self.accounts.get(str(status.user.id))
+        if account is None:
+            # Replies and retweets of followed accounts by anyone else
+            return False
+        return account["replies"] or not status.in_reply_to_screen_name
+
+    async def post_tweets(self, statuses: List[tw.Status]):
+        """Posts a batch of tweets from one account to its channels"""
+        username = statuses[0].user.screen_name
+        user_id = statuses[0].user.id
 
         if str(user_id) not in self.accounts:
             return
-        if status.in_reply_to_screen_name and not self.accounts[str(user_id)]["replies"]:
+        if not self.accounts[str(user_id)]["replies"]:
+            statuses = [s for s in statuses if not s.in_reply_to_screen_name]
+        if not statuses:
+            return
+        posts = []
+        for status in statuses:
+            try:
+                em = await self.build_tweet_embed(status)
+            except Exception:
+                # Don't lose the rest of the batch to one bad tweet
+                log.error("Error building tweet embed for %s", status.id, exc_info=True)
+                continue
+            posts.append((em, status))
+        if not posts:
             return
-        em = await self.build_tweet_embed(status)
         # channel_list = account.channel
         tasks = []
         for channel in self.accounts[str(user_id)]["channel"]:
@@ -259,9 +311,22 @@ class Tweets(commands.Cog):
             if channel_send is None:
                 await self.del_account(channel, user_id, username)
                 continue
-            tasks.append(self.post_tweet_status(channel_send, em, status))
+            tasks.append(self.post_tweet_batch(channel_send, posts))
         await asyncio.gather(*tasks, return_exceptions=True)
 
+    def guild_limit(self, guild: discord.Guild) -> asyncio.Semaphore:
+        limit = self.guild_limits.get(guild.id)
+        if limit is None:
+            limit = asyncio.Semaphore(GUILD_CONCURRENCY)
+            self.guild_limits[guild.id] = limit
+        return limit
+
+    async def post_tweet_batch(self, channel_send, posts: List[Tuple[discord.Embed, tw.Status]]):
+        # Keep the tweets in order within each channel
+        async with self.guild_limit(channel_send.guild):
+            for em, status in posts:
+                await self.post_tweet_status(channel_send, em, status)
+
     async def post_tweet_status(self, channel_send, em, status):
         username = status.user.screen_name
         post_url = f"https://twitter.com/{status.user.screen_name}/status/{status.id}"
@@ -269,18 +334,19 @@ class Tweets(commands.Cog):
             if channel_send.permissions_for(channel_send.guild.me).embed_links:
                 await channel_send.send(post_url, embed=em)
             elif channel_send.permissions_for(channel_send.guild.me).manage_webhooks:
-                webhook = None
-                for hook in await channel_send.webhooks():
-                    if hook.name == channel_send.guild.me.name:
-                        webhook = hook
-                if webhook is None:
-                    webhook = await channel_send.create_webhook(
-                        name=channel_send.guild.me.name
-                    )
                 avatar = status.user.profile_image_url
-                await webhook.send(
-                    post_url, username=username, avatar_url=avatar, embed=em
-                )
+                webhook = await self.webhooks.get(channel_send)
+                try:
+                    await webhook.send(
+                        post_url, username=username, avatar_url=avatar, embed=em
+                    )
+                except discord.errors.NotFound:
+                    # The webhook was deleted, find or make a new one
+                    self.webhooks.invalidate(channel_send.id)
+                    webhook = await self.webhooks.get(channel_send)
+                    await webhook.send(
+                        post_url, username=username, avatar_url=avatar, embed=em
+                    )
             else:
                 await channel_send.send(post_url)
         except Exception:
@@ -525,6 +591,28 @@ class Tweets(commands.Cog):
             del self.accounts[u_id]
         await self.config.accounts.set(self.accounts)
 
+    @_autotweet.command(name="queue")
+    @checks.is_owner()
+    async def queue_stats(self, ctx: commands.context):
+        """Show how many tweets are waiting to be posted"""
+        queue = self.tweet_queue
+        msg = _(
+            "Waiting: {depth} (most {max_depth})\n"
+            "Received: {received} ({ignored} ignored)\n"
+            "Posted: {posted} in {batches} batches\n"
+            "Dropped: {dropped} from busy accounts, {overflow} from a full queue"
+        ).format(
+            depth=queue.depth,
+            max_depth=queue.max_depth,
+            received=queue.received,
+            ignored=queue.ignored,
+            posted=queue.posted,
+            batches=queue.batches,
+            dropped=queue.dropped,
+            overflow=queue.overflow,
+        )
+        await ctx.send(msg)
+
     @_autotweet.command(name="restart")
     async def restart_stream(self, ctx: commands.context):
         """Restarts the twitter stream if any issues occur."""
@@ -865,6 +953,7 @@ class Tweets(commands.Cog):
             "access_secret": access_secret,
         }
         await self.config.api.set(api)
+        self.api = None
         if ctx.channel.permissions_for(ctx.me).manage_messages:
             await ctx.message.delete()
         await ctx.send(_("Set the access credentials!"))
@@ -873,5 +962,6 @@ class Tweets(commands.Cog):
         if self.mystream is not None:
             self.mystream.disconnect()
         self.twitter_loop.cancel()
+        self.tweet_queue.close()
 
     __unload = cog_unload
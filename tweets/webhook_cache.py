@@ -0,0 +1,46 @@
+import asyncio
+import discord
+
+from typing import Dict, Optional
+from weakref import WeakValueDictionary
+
+
+class WebhookCache:
+    """
+        The webhook used to post tweets in each channel
+
+        A channel's webhooks are only listed the first time a tweet is
+        posted there, creating one if needed. The webhook is kept until
+        posting with it fails with NotFound and `invalidate` is called.
+    """
+
+    def __init__(self):
+        self._webhooks: Dict[int, discord.Webhook] = {}
+        # A lock only lives while some lookup holds or waits on it, so every
+        # concurrent lookup for a channel shares it without keeping it forever
+        self._locks: "WeakValueDictionary[int, asyncio.Lock]" = WeakValueDictionary()
+
+    async def get(self, channel: discord.TextChannel) -> Optional[discord.Webhook]:
+        webhook = self._webhooks.get(channel.id)
+        if webhook is not None:
+            return webhook
+        lock = self._locks.get(channel.id)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._locks[channel.id] = lock
+        async with lock:
+            # Another post may have found it while we waited
+            webhook = self._webhooks.get(channel.id)
+            if webhook is not None:
+                return webhook
+            name = channel.guild.me.name
+            for hook in await channel.webhooks():
+                if hook.name == name:
+                    webhook = hook
+            if webhook is None:
+                webhook = await channel.create_webhook(name=name)
+            self._webhooks[channel.id] = webhook
+        return webhook
+
+    def invalidate(self, channel_id: int) -> None:
+        self._webhooks.pop(channel_id, None)
@@ -4,14 +4,19 @@ from redbot.core.commands import Context
 from .twitch_profile import TwitchProfile
 from .twitch_follower import TwitchFollower
 from .errors import *
+from .twitch_api import TwitchAPI
 from datetime import datetime
 import asyncio
 import aiohttp
-import time
+import logging
+
+from typing import Dict, List, Set
 
 
 BASE_URL = "https://api.twitch.tv/helix"
 
+log = logging.getLogger("red.trusty-cogs.Twitch")
+
 
 class Twitch(commands.Cog):
     """
@@ -32,91 +37,14 @@ class Twitch(commands.Cog):
         self.config.register_user(**self.user_defaults, force_registration=True)
         self.bot = bot
         self.session = aiohttp.ClientSession(loop=self.bot.loop)
-        self.rate_limit_resets = set()
-        self.rate_limit_remaining = 0
+        self.api = TwitchAPI(self.config, self.session)
+        # account id -> follower ids already posted
+        self.seen_followers: Dict[str, Set[str]] = {}
         self.loop = bot.loop.create_task(self.check_for_new_followers())
 
-    #####################################################################################
-    # Logic for accessing twitch API with rate limit checks                             #
-    # https://github.com/tsifrer/python-twitch-client/blob/master/twitch/helix/base.py  #
-    #####################################################################################
-
-    async def get_header(self):
-        header = {"Client-ID": await self.config.client_id()}
-        access_token = await self.config.access_token()
-        if access_token != {}:
-            # Return bearer token if availavble for more access
-            header["Authorization"] = "Bearer {}".format(access_token["access_token"])
-        return header
-
-    async def wait_for_rate_limit_reset(self):
-        """Check rate limits in response header and ensure we're following them
-        https://github.com/tsifrer/python-twitch-client/blob/master/twitch/helix/base.py
-        """
-        if self.rate_limit_remaining == 0:
-            current_time = int(time.time())
-            self.rate_limit_resets = set(x for x in self.rate_limit_resets if x > current_time)
-
-            if len(self.rate_limit_resets) > 0:
-                reset_time = list(self.rate_limit_resets)[0]
-                # Calculate wait time and add 0.1s to the wait time to allow Twitch to reset
-                # their counter
-                wait_time = reset_time - current_time + 0.1
-                await asyncio.sleep(wait_time)
-
-    async def oauth_check(self):
-        url = "https://id.twitch.tv/oauth2/token"
-        client_id = await self.config.client_id()
-        client_secret = await self.config.client_secret()
-        access_token = await self.config.access_token()
-        if client_secret == "":
-            # Can't get the app access token without the client secret being set
-            return
-        if access_token == {}:
-            # Attempts to acquire an app access token
-            params = {
-                "client_id": client_id,
-                "client_secret": client_secret,
-                "grant_type": "client_credentials",
-                "scope": "analytics:read:extensions analytics:read:games bits:read clips:edit user:edit user:edit:broadcast",
-            }
-            async with self.session.post(url, params=params) as resp:
-                access_token = await resp.json()
-            await self.config.access_token.set(access_token)
-        else:
-            if "access_token" not in access_token:
-                # Tries to re-aquire access token if set one is incorrect
-                await self.config.access_token.set({})
-                return await self.oauth_check()
-            header = {"Authorization": "OAuth {}".format(access_token["access_token"])}
-            url = "https://id.twitch.tv/oauth2/validate"
-            resp = await self.session.get(url, headers=header)
-            if resp.status == 200:
-                # Validates the access token before use
-                return
-            else:
-                await self.config.access_token.set({})
-                return await self.oauth_check()
-
     async def get_response(self, url):
         """Get responses from twitch after checking rate limits"""
-        await self.oauth_check()
-        header = await self.get_header()
-        await self.wait_for_rate_limit_reset()
-        resp = await self.session.get(url, headers=header)
-        remaining = resp.headers.get("Ratelimit-Remaining")
-        if remaining:
-            self.rate_limit_remaining = int(remaining)
-        reset = resp.headers.get("Ratelimit-Reset")
-        if reset:
-            self.rate_limit_resets.add(int(reset))
-
-        if resp.status == 429:
-            return self.get_response(url)
-
-        return await resp.json()
-
-    #####################################################################################
+        return await self.api.get(url)
 
     async def make_user_embed(self, profile):
         # makes the embed for a twitch profile
@@ -177,6 +105,18 @@ class Twitch(commands.Cog):
         url = "{}/users?id={}".format(BASE_URL, twitch_id)
         return TwitchProfile.from_json(await self.get_response(url))
 
+    async def get_profiles_from_ids(self, twitch_ids: List[str]) -> Dict[str, TwitchProfile]:
+        """Look up many profiles at once, twitch allows 100 per request"""
+        profiles = {}
+        for i in range(0, len(twitch_ids), 100):
+            query = "&".join("id={}".format(x) for x in twitch_ids[i : i + 100])
+            url = "{}/users?{}".format(BASE_URL, query)
+            data = await self.get_response(url)
+            for user in data.get("data", []):
+                profile = TwitchProfile.from_user(user)
+                profiles[profile.id] = profile
+        return profiles
+
     async def get_new_followers(self, user_id):
         # Gets the last 100 followers from twitch
         url = "{}/users/follows?to_id={}&first=100".format(BASE_URL, user_id)
@@ -215,28 +155,64 @@ class Twitch(commands.Cog):
         await self.bot.wait_until_ready()
         while self is self.bot.get_cog("Twitch"):
             check_accounts = await self.config.twitch_accounts()
-            for account in check_accounts:
-                followers, total = await self.get_new_followers(account["id"])
-                for follow in reversed(followers):
-                    if follow.from_id not in account["followers"]:
-                        try:
-                            profile = await self.get_profile_from_id(follow.from_id)
-                        except Exception as e:
-                            print(e)
-                        print(
-                            "{} Followed! You have {} followers now.".format(profile.login, total)
-                        )
-                        em = await self.make_follow_embed(profile, total)
-                        for channel_id in account["channels"]:
-                            channel = self.bot.get_channel(id=channel_id)
-                            await channel.send(embed=em)
-                        check_accounts.remove(account)
-                        account["followers"].append(follow.from_id)
-                        check_accounts.append(account)
-                        await self.config.twitch_accounts.set(check_accounts)
-
+            # The api rate limit paces these so they can all run at once
+            results = await asyncio.gather(
+                *[self.check_account_followers(account) for account in check_accounts],
+                return_exceptions=True,
+            )
+            new_followers = {}
+            for account, follows in zip(check_accounts, results):
+                if isinstance(follows, Exception):
+                    log.error("Error checking followers for %s", account["id"], exc_info=follows)
+                    continue
+                if follows:
+                    new_followers[account["id"]] = follows
+            if new_followers:
+                await self.save_new_followers(new_followers)
             await asyncio.sleep(60)
 
+    async def check_account_followers(self, account: dict) -> List[str]:
+        """Post any new followers for an account and return their ids"""
+        seen = self.seen_followers.get(account["id"])
+        if seen is None:
+            seen = set(account["followers"])
+            self.seen_followers[account["id"]] = seen
+        followers, total = await self.get_new_followers(account["id"])
+        # twitch returns the newest followers first
+        new_ids = []
+        for follow in reversed(followers):
+            if follow.from_id not in seen:
+                new_ids.append(follow.from_id)
+        if not new_ids:
+            return []
+        profiles = await self.get_profiles_from_ids(new_ids)
+        for follower_id in new_ids:
+            seen.add(follower_id)
+            profile = profiles.get(follower_id)
+            if profile is None:
+                continue
+            log.debug(
+                "%s followed %s, they have %s followers now", profile.login, account["login"], total
+            )
+            em = await self.make_follow_embed(profile, total)
+            for channel_id in account["channels"]:
+                channel = self.bot.get_channel(id=channel_id)
+                if channel is None:
+                    continue
+                try:
+                    await channel.send(embed=em)
+                except discord.errors.HTTPException:
+                    pass
+        return new_ids
+
+    async def save_new_followers(self, new_followers: Dict[str, List[str]]):
+        """Save every account's new followers in one write"""
+        async with self.config.twitch_accounts() as accounts:
+            for account in accounts:
+                follows = new_followers.get(account["id"])
+                if follows:
+                    account["followers"].extend(follows)
+
     @commands.group(aliases=["t", "twi"])
     async def twitchhelp(self, ctx):
         """Twitch related commands"""
@@ -273,6 +249,7 @@ class Twitch(commands.Cog):
             }
 
             cur_accounts.append(user_data)
+            self.seen_followers[profile.id] = set(followers)
             await self.config.twitch_accounts.set(cur_accounts)
         else:
             cur_accounts.remove(user_data)
@@ -321,6 +298,7 @@ class Twitch(commands.Cog):
                 user_data["channels"].remove(channel.id)
                 if len(user_data["channels"]) == 0:
                     # We don't need to be checking if there's no channels to post in
+                    self.seen_followers.pop(profile.id, None)
                     await self.config.twitch_accounts.set(cur_accounts)
                 else:
                     cur_accounts.append(user_data)
@@ -387,12 +365,7 @@ class Twitch(commands.Cog):
            https://github.com/Lunar-Dust/Dusty-Cogs/blob/master/menu/menu.py"""
         user_id = post_list[page].from_id
         followed_at = post_list[page].followed_at
-        url = "{}/users?id={}".format(BASE_URL, user_id)
-        header = {"Client-ID": await self.config.client_id()}
-        async with self.session.get(url, headers=header) as resp:
-            data = await resp.json()
-
-        profile = TwitchProfile.from_json(data)
+        profile = await self.get_profile_from_id(user_id)
         if ctx.channel.permissions_for(ctx.me).embed_links:
             em = await self.make_user_embed(profile)
             em.timestamp = datetime.strptime(followed_at, "%Y-%m-%dT%H:%M:%SZ")
@@ -471,6 +444,7 @@ class Twitch(commands.Cog):
         await self.config.client_id.set(client_id)
         if client_secret is not None:
             await self.config.client_secret.set(client_secret)
+        self.api.clear()
         await ctx.send("Twitch token set.")
 
     def cog_unload(self):
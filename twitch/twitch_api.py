@@ -0,0 +1,171 @@
+import asyncio
+import aiohttp
+import time
+
+from typing import Optional
+
+from .errors import TwitchError
+
+TOKEN_URL = "https://id.twitch.tv/oauth2/token"
+VALIDATE_URL = "https://id.twitch.tv/oauth2/validate"
+SCOPES = (
+    "analytics:read:extensions analytics:read:games bits:read clips:edit user:edit user:edit:broadcast"
+)
+
+
+class TokenBucket:
+    """
+        Paces requests to stay inside twitch's rate limit
+
+        Starts at `rate` requests every `per` seconds and is corrected from
+        the `Ratelimit-Limit`, `Ratelimit-Remaining` and `Ratelimit-Reset`
+        headers on every response.
+        https://dev.twitch.tv/docs/api/guide/#rate-limits
+    """
+
+    def __init__(self, rate: int = 30, per: float = 60.0):
+        self.per = per
+        self.capacity = float(rate)
+        self.tokens = float(rate)
+        self.reset = 0.0
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self._updated) * self.capacity / self.per
+        )
+        self._updated = now
+        if self.reset and time.time() >= self.reset:
+            # twitch has refilled the whole bucket
+            self.tokens = self.capacity
+            self.reset = 0.0
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) * self.per / self.capacity
+                if self.reset:
+                    wait = min(wait, max(0.0, self.reset - time.time()) + 0.1)
+                await asyncio.sleep(wait)
+
+    def update(self, headers) -> None:
+        self._refill()
+        limit = headers.get("Ratelimit-Limit")
+        if limit:
+            self.capacity = float(limit)
+        remaining = headers.get("Ratelimit-Remaining")
+        if remaining:
+            # requests from elsewhere share the same bucket
+            self.tokens = min(self.tokens, float(remaining))
+        reset = headers.get("Ratelimit-Reset")
+        if reset:
+            self.reset = float(reset)
+
+    def empty(self) -> None:
+        self.tokens = 0.0
+
+
+class TwitchAPI:
+    """
+        Makes requests to twitch
+
+        The client ID and app access token are kept in memory, the token is
+        only validated again once it expires or twitch rejects it.
+    """
+
+    def __init__(self, config, session: aiohttp.ClientSession, max_retries: int = 5):
+        self.config = config
+        self.session = session
+        self.max_retries = max_retries
+        self.bucket = TokenBucket()
+        self._client_id: Optional[str] = None
+        self._token: Optional[str] = None
+        self._token_expires = 0.0
+        self._token_lock = asyncio.Lock()
+
+    def clear(self) -> None:
+        """Forget the cached credentials after they're changed"""
+        self._client_id = None
+        self._token = None
+        self._token_expires = 0.0
+
+    async def get_token(self) -> Optional[str]:
+        async with self._token_lock:
+            if self._token is not None and time.time() < self._token_expires:
+                return self._token
+            self._token = None
+            client_secret = await self.config.client_secret()
+            access_token = await self.config.access_token()
+            if client_secret == "":
+                # Can't get or refresh the app access token without the client secret
+                # being set but one already saved can still be used as it is
+                if "access_token" not in access_token:
+                    return None
+                self._set_token(access_token["access_token"], None)
+                return self._token
+            if "access_token" in access_token:
+                header = {"Authorization": "OAuth {}".format(access_token["access_token"])}
+                async with self.session.get(VALIDATE_URL, headers=header) as resp:
+                    if resp.status == 200:
+                        # Validates the access token before use
+                        data = await resp.json()
+                        self._set_token(access_token["access_token"], data.get("expires_in"))
+                        return self._token
+            # Attempts to acquire a new app access token
+            params = {
+                "client_id": await self.config.client_id(),
+                "client_secret": client_secret,
+                "grant_type": "client_credentials",
+                "scope": SCOPES,
+            }
+            async with self.session.post(TOKEN_URL, params=params) as resp:
+                access_token = await resp.json()
+            if "access_token" not in access_token:
+                await self.config.access_token.set({})
+                return None
+            await self.config.access_token.set(access_token)
+            self._set_token(access_token["access_token"], access_token.get("expires_in"))
+            return self._token
+
+    def _set_token(self, token: str, expires_in: Optional[int]) -> None:
+        self._token = token
+        # Check again in an hour if twitch doesn't say when it expires
+        self._token_expires = time.time() + (expires_in or 3600)
+
+    async def get_header(self) -> dict:
+        if self._client_id is None:
+            self._client_id = await self.config.client_id()
+        header = {"Client-ID": self._client_id}
+        token = await self.get_token()
+        if token is not None:
+            # Return bearer token if available for more access
+            header["Authorization"] = "Bearer {}".format(token)
+        return header
+
+    async def get(self, url: str) -> dict:
+        """Get responses from twitch after checking rate limits"""
+        for attempt in range(self.max_retries):
+            await self.bucket.acquire()
+            header = await self.get_header()
+            async with self.session.get(url, headers=header) as resp:
+                self.bucket.update(resp.headers)
+                if resp.status == 429:
+                    self.bucket.empty()
+                    if self.bucket.reset:
+                        wait = max(0.0, self.bucket.reset - time.time()) + 0.1
+                    else:
+                        wait = 2 ** attempt
+                    await asyncio.sleep(wait)
+                    continue
+                if resp.status == 401 and "Authorization" in header:
+                    # token was revoked or expired early
+                    self._token = None
+                    continue
+                return await resp.json()
+        raise TwitchError("Twitch is not responding to requests right now.")
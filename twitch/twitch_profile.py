@@ -47,7 +47,10 @@ class TwitchProfile:
 
     @classmethod
     def from_json(cls, data: dict):
-        data = data["data"][0]
+        return cls.from_user(data["data"][0])
+
+    @classmethod
+    def from_user(cls, data: dict):
         return cls(
             data["id"],
             data["login"],